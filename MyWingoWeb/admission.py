@@ -0,0 +1,107 @@
+import math
+import time
+import hashlib
+import threading
+from config import RATE_LIMIT_RATE, RATE_LIMIT_BURST, RATE_LIMIT_CLIENTS, TRUST_PROXY
+
+# --- RATE LIMITING ---
+
+class RateLimiter:
+    """
+    Token bucket per client: `burst` requests at once, refilled at `rate`
+    per second. A client idle long enough to be full again carries no
+    state, so those entries are dropped when the table grows.
+    """
+
+    def __init__(self, rate=RATE_LIMIT_RATE, burst=RATE_LIMIT_BURST, max_clients=RATE_LIMIT_CLIENTS):
+        self.rate = rate
+        self.burst = burst
+        self.max_clients = max_clients
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def check(self, client, now=None):
+        """0 if the request is admitted, else seconds until it would be."""
+        if self.rate <= 0: return 0
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            tokens, stamp = self._buckets.get(client, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - stamp) * self.rate)
+            if tokens >= 1:
+                self._buckets[client] = (tokens - 1, now)
+                wait = 0
+            else:
+                self._buckets[client] = (tokens, now)
+                wait = (1 - tokens) / self.rate
+            if len(self._buckets) > self.max_clients:
+                self._prune(now)
+        return wait
+
+    def _prune(self, now):
+        window = self.burst / self.rate
+        for key in [k for k, (_, stamp) in self._buckets.items() if now - stamp >= window]:
+            del self._buckets[key]
+
+def client_id(remote_addr, forwarded_for=None):
+    """Rate-limit key. Behind a proxy (TRUST_PROXY=1) the hop it appended is the client."""
+    if TRUST_PROXY and forwarded_for:
+        return forwarded_for.split(",")[-1].strip()
+    return remote_addr or "unknown"
+
+def retry_after(wait):
+    return str(max(1, math.ceil(wait)))
+
+# --- COALESCING ---
+
+class _Call:
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+class Coalescer:
+    """Concurrent run() calls with the same key share one fn() call and its result."""
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def run(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+        if not leader:
+            call.event.wait()
+        else:
+            try:
+                call.result = fn()
+            except Exception as e:
+                call.error = e
+            finally:
+                with self._lock:
+                    self._calls.pop(key, None)
+                call.event.set()
+        if call.error is not None: raise call.error
+        return call.result
+
+# --- CONDITIONAL REQUESTS ---
+
+def make_etag(platform, game_time, period):
+    """
+    One validator per (platform, time, period): the response only changes
+    with the draw. Hashed, since platform/time come from the client and
+    may hold characters a header can't carry.
+    """
+    key = f"{platform}\0{'30s' if game_time == '30s' else '1m'}\0{period}"
+    return '"' + hashlib.sha1(key.encode("utf-8", "surrogatepass")).hexdigest()[:20] + '"'
+
+def etag_matches(if_none_match, etag):
+    if not if_none_match: return False
+    if if_none_match.strip() == "*": return True
+    tags = [t.strip() for t in if_none_match.split(",")]
+    return etag in tags or f"W/{etag}" in tags
+
+limiter = RateLimiter()
+coalescer = Coalescer()
@@ -3,9 +3,36 @@ import time
 import logging
 import json
 import random
+import threading
+from array import array
+from requests.adapters import HTTPAdapter
+from trend_state import TrendState
+from history import DrawHistory
+from shared_state import get_backend
+from metrics import REGISTRY
+from draw_store import get_store
+from fastjson import decode_current, decode_history
+from draw_clock import DrawClock
+from config import (HTTP_POOL_SIZE, HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT,
+                    HTTP_RETRIES, HTTP_BACKOFF, BREAKER_THRESHOLD, BREAKER_COOLDOWN, SHARED_WAIT,
+                    DRAW_STORE_ENABLED)
 
 logger = logging.getLogger(__name__)
 
+# --- METRICS ---
+UPSTREAM_LATENCY = REGISTRY.histogram(
+    "wingo_upstream_request_seconds", "Upstream HTTP fetch latency, retries included.",
+    ("source", "game_type", "endpoint"))
+UPSTREAM_PARSE = REGISTRY.histogram(
+    "wingo_upstream_parse_seconds", "JSON decode and row parsing of upstream payloads.",
+    ("source", "endpoint"))
+UPSTREAM_ERRORS = REGISTRY.counter(
+    "wingo_upstream_errors_total", "Failed upstream fetches (endpoint=circuit_open when skipped).",
+    ("source", "game_type", "endpoint"))
+GAME_CACHE = REGISTRY.counter(
+    "wingo_game_cache_total", "Game-data lookups by result (hit, miss, coalesced, latest).",
+    ("source", "game_type", "result"))
+
 # --- COMMON API (Tiranga / RajaGames) ---
 COMMON_URLS = {
     "30s": {
@@ -54,73 +81,552 @@ def get_headers(platform="Tiranga"):
         })
     return base_headers
 
+# --- POOLED SESSIONS & CIRCUIT BREAKER ---
+
+class CircuitOpenError(Exception):
+    pass
+
+class CircuitBreaker:
+    """
+    Opens after `threshold` consecutive failures and fails fast until
+    `cooldown` seconds have passed, then lets a trial request through.
+    """
+
+    def __init__(self, threshold=BREAKER_THRESHOLD, cooldown=BREAKER_COOLDOWN):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.opened_at is None: return True
+            if time.time() - self.opened_at >= self.cooldown:
+                # Half-open: one trial, re-armed if it fails.
+                self.opened_at = time.time()
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.failures >= self.threshold:
+                if self.opened_at is None:
+                    logger.warning(f"Circuit opened after {self.failures} failures.")
+                self.opened_at = time.time()
+
+    @property
+    def is_blocked(self):
+        opened_at = self.opened_at
+        return opened_at is not None and time.time() - opened_at < self.cooldown
+
+_sessions = {}
+_breakers = {"TrustWin": CircuitBreaker(), "Common": CircuitBreaker()}
+_sessions_lock = threading.Lock()
+
+def _source(platform):
+    return "TrustWin" if platform == "TrustWin" else "Common"
+
+def get_session(platform="Tiranga"):
+    """One keep-alive connection pool per upstream source."""
+    source = _source(platform)
+    with _sessions_lock:
+        session = _sessions.get(source)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=2, pool_maxsize=HTTP_POOL_SIZE, max_retries=0)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            session.headers.update(get_headers(platform))
+            _sessions[source] = session
+    return session
+
+def _http_get(platform, url, headers=None):
+    """
+    GET with the source's breaker. Connect errors and 5xx answers are
+    retried with jittered backoff; read timeouts are not.
+    """
+    breaker = _breakers[_source(platform)]
+    if not breaker.allow():
+        raise CircuitOpenError(f"{_source(platform)} circuit open")
+
+    session = get_session(platform)
+    last_error = None
+    for attempt in range(HTTP_RETRIES + 1):
+        if attempt:
+            time.sleep(HTTP_BACKOFF * (2 ** (attempt - 1)) + random.uniform(0, HTTP_BACKOFF))
+        try:
+            resp = session.get(url, headers=headers, timeout=(HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT))
+            if resp.status_code < 500:
+                breaker.record_success()
+                return resp
+            last_error = requests.HTTPError(f"HTTP {resp.status_code}")
+        except requests.ConnectionError as e:
+            last_error = e  # connect failures and resets fail fast: retry
+        except requests.RequestException as e:
+            # A read timeout already spent HTTP_READ_TIMEOUT on a host that
+            # is likely hung; retrying would only multiply the wait.
+            last_error = e
+            break
+    breaker.record_failure()
+    raise last_error
+
+def _request_plan(game_type, platform):
+    """URLs, headers and cache-busting suffix for one fetch."""
+    if platform == "TrustWin":
+        urls = TRUSTWIN_URLS["30s"] if game_type == "30s" else TRUSTWIN_URLS["1m"]
+        headers = get_headers("TrustWin")
+        # TrustWin often requires a fresh timestamp in the URL to prevent caching
+        ts = int(time.time() * 1000)
+        url_suffix = f"&random={ts}&timestamp={ts}" # Dummy params to mimic browser
+    else:
+        key = "30s" if game_type == "30s" else "1m"
+        urls = COMMON_URLS[key]
+        headers = get_headers("Tiranga")
+        ts = int(time.time() * 1000)
+        url_suffix = f"?ts={ts}"
+    return urls, headers, url_suffix
+
+def _finish(current_period, clean_history):
+    # If current period failed but history worked, calculate next period
+    if not current_period and clean_history:
+        try:
+            last_issue = clean_history.periods[-1] if isinstance(clean_history, DrawHistory) else int(clean_history[-1]['p'])
+            current_period = str(last_issue + 1)
+        except: pass
+
+    return str(current_period) if current_period else None, clean_history
+
 def get_game_data(game_type="30s", platform="Tiranga"):
+    return _fetch_game_data(game_type, platform)[:2]
+
+def _fetch_game_data(game_type, platform):
+    """
+    get_game_data plus `current_at`: when the current-period response
+    arrived, the sighting DrawClock needs (None if the period was not
+    read from that response).
+    """
     clean_history = []
     current_period = None
+    current_at = None
+
+    source, game = cache_key(game_type, platform)
+    if _breakers[source].is_blocked:
+        # Fail fast; callers fall back to the last known draw.
+        UPSTREAM_ERRORS.inc(source, game, "circuit_open")
+        return None, [], None
     
     try:
         # --- 1. SETUP URLS & HEADERS ---
-        if platform == "TrustWin":
-            urls = TRUSTWIN_URLS["30s"] if game_type == "30s" else TRUSTWIN_URLS["1m"]
-            headers = get_headers("TrustWin")
-            # TrustWin often requires a fresh timestamp in the URL to prevent caching
-            ts = int(time.time() * 1000)
-            url_suffix = f"&random={ts}&timestamp={ts}" # Dummy params to mimic browser
-        else:
-            key = "30s" if game_type == "30s" else "1m"
-            urls = COMMON_URLS[key]
-            headers = get_headers("Tiranga")
-            ts = int(time.time() * 1000)
-            url_suffix = f"?ts={ts}"
+        urls, headers, url_suffix = _request_plan(game_type, platform)
 
         # --- 2. GET CURRENT PERIOD ---
         try:
             # We use GET for everything now to avoid the Signature issue
-            curr_resp = requests.get(urls["current"] + url_suffix, headers=headers, timeout=5)
-            curr_data = curr_resp.json()
-            
-            # Debugging TrustWin
-            if platform == "TrustWin" and curr_resp.status_code != 200:
-                print(f"DEBUG TRUSTWIN CURRENT: {curr_resp.status_code}")
-
-            if isinstance(curr_data, dict):
-                # Handle standard 'data' -> 'issueNumber' structure
-                if 'data' in curr_data and isinstance(curr_data['data'], dict):
-                    current_period = curr_data['data'].get('issueNumber')
-                elif 'issueNumber' in curr_data:
-                    current_period = curr_data.get('issueNumber')
+            with UPSTREAM_LATENCY.time(source, game, "current"):
+                curr_resp = _http_get(platform, urls["current"] + url_suffix, headers=headers)
+            arrived_at = time.time()
+            if curr_resp.status_code != 200:
+                logger.warning(f"Current ({platform}) returned HTTP {curr_resp.status_code}")
+            with UPSTREAM_PARSE.time(source, "current"):
+                current_period = decode_current(curr_resp.content)
+            if current_period: current_at = arrived_at
 
         except Exception as e:
+            UPSTREAM_ERRORS.inc(source, game, "current")
             logger.error(f"Error fetching current ({platform}): {e}")
 
         # --- 3. GET HISTORY ---
         try:
-            hist_resp = requests.get(urls["history"] + url_suffix, headers=headers, timeout=5)
-            hist_data = hist_resp.json()
-            
-            raw_list = hist_data.get('data', {}).get('list', [])
-            
-            for item in raw_list:
-                period = str(item['issueNumber'])
-                result_num = int(item['number'])
-                outcome = "Small" if result_num <= 4 else "Big"
-                clean_history.append({'p': period, 'r': result_num, 'o': outcome})
-            
-            clean_history.reverse()
+            with UPSTREAM_LATENCY.time(source, game, "history"):
+                hist_resp = _http_get(platform, urls["history"] + url_suffix, headers=headers)
+            with UPSTREAM_PARSE.time(source, "history"):
+                clean_history = decode_history(hist_resp.content)
 
         except Exception as e:
+            UPSTREAM_ERRORS.inc(source, game, "history")
             logger.error(f"Error fetching history ({platform}): {e}")
 
         # --- 4. FALLBACK ---
-        # If current period failed but history worked, calculate next period
-        if not current_period and clean_history:
+        return (*_finish(current_period, clean_history), current_at)
+
+    except Exception as e:
+        logger.error(f"Critical API Error ({platform}): {e}")
+        return None, [], None
+
+# --- PER-PERIOD GAME DATA CACHE ---
+# Draws happen on fixed boundaries, so one upstream fetch per
+# (source, game_type) per draw is enough for every request in between.
+# A DrawClock per key learns those boundaries from observed periods.
+GAME_INTERVALS = {"30s": 30, "1m": 60}
+
+_cache = {}
+_clocks = {}
+_cache_lock = threading.Lock()
+_inflight = {}
+_listeners = []
+_trends = {}
+
+class _Flight:
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = (None, [])
+
+def cache_key(game_type, platform):
+    # Tiranga and RajaGames share COMMON_URLS, so they share one entry.
+    return _source(platform), ("30s" if game_type == "30s" else "1m")
+
+def draw_slot(game_type, now=None):
+    """Nominal epoch-aligned draw boundary; a key every worker computes alike."""
+    interval = GAME_INTERVALS["30s" if game_type == "30s" else "1m"]
+    now = time.time() if now is None else now
+    return (int(now) // interval + 1) * interval
+
+def get_draw_clock(game_type="30s", platform="Tiranga"):
+    key = cache_key(game_type, platform)
+    clock = _clocks.get(key)
+    if clock is None:
+        clock = _clocks.setdefault(key, DrawClock(GAME_INTERVALS[key[1]]))
+    return clock
+
+def next_draw_at(game_type, now=None, platform="Tiranga"):
+    """When the next period is expected to be out upstream (learned, epoch-aligned until then)."""
+    return get_draw_clock(game_type, platform).next_draw_at(now)
+
+def draw_window(game_type, period, platform="Tiranga"):
+    """Learned (earliest, latest) time `period` goes live upstream, or None."""
+    return get_draw_clock(game_type, platform).window(period)
+
+def add_listener(callback):
+    """callback(game_type, platform, period, history) runs once per new period."""
+    _listeners.append(callback)
+
+def _new_trend(key):
+    # Warm start: seed from the local draw store so the trend helpers see
+    # more than one upstream page right after a restart.
+    trend = TrendState()
+    if DRAW_STORE_ENABLED:
+        try:
+            trend.sync(get_store(*key).tail(trend.capacity))
+        except Exception as e:
+            logger.error(f"Draw store warm start failed ({key}): {e}")
+    return trend
+
+def _persist_draws(key, history):
+    try:
+        get_store(*key).append(history)
+    except Exception as e:
+        logger.error(f"Draw store append failed ({key}): {e}")
+
+def store_game_data(game_type, platform, period, history, fetched_at=None):
+    """
+    Publishes freshly fetched data so requests can read it from memory.
+    `fetched_at` is when the current-period response reporting `period`
+    arrived (None if unknown); it feeds the draw clock, so it must not be
+    the time of this call.
+    """
+    if not period: return
+    key = cache_key(game_type, platform)
+    clock = get_draw_clock(game_type, platform)
+    if fetched_at is not None:
+        clock.observe(period, fetched_at)
+    with _cache_lock:
+        previous = _cache.get(key)
+        _cache[key] = (clock.expires_at(period), period, history)
+        trend = _trends.get(key)
+        if trend is None:
+            trend = _trends[key] = _new_trend(key)
+        trend.sync(history)
+    if previous is None or previous[1] != period:
+        if DRAW_STORE_ENABLED and history:
+            _persist_draws(key, history)
+        for callback in _listeners:
             try:
-                last_issue = int(clean_history[-1]['p'])
-                current_period = str(last_issue + 1)
-            except: pass
+                callback(game_type, platform, period, history)
+            except Exception as e:
+                logger.error(f"Listener error ({platform} {game_type}): {e}")
 
-        return str(current_period) if current_period else None, clean_history
+def get_latest_game_data(game_type="30s", platform="Tiranga"):
+    """Last stored period and history, even if the next draw is already due."""
+    key = cache_key(game_type, platform)
+    with _cache_lock:
+        entry = _cache.get(key)
+    if not entry: return None, []
+    GAME_CACHE.inc(key[0], key[1], "latest")
+    return entry[1], entry[2]
 
+def get_trend_state(game_type="30s", platform="Tiranga"):
+    """Incremental TrendState kept in step with stored history (or None)."""
+    return _trends.get(cache_key(game_type, platform))
+
+def get_long_history(game_type="30s", platform="Tiranga", count=1000):
+    """Up to `count` newest draws from the local draw store, no upstream call."""
+    if not DRAW_STORE_ENABLED: return DrawHistory()
+    return get_store(*cache_key(game_type, platform)).tail(count)
+
+# --- SHARED TIER (multi-worker) ---
+# With a shared backend, exactly one worker per (source, game_type) per
+# draw wins the lock and fetches upstream; the rest read its result.
+# The leader also leaves its result under result:<lock key>, tagged with
+# its lock token, for followers that need the outcome of that very fetch.
+
+def _shared_key(game_type, platform):
+    source, game = cache_key(game_type, platform)
+    return f"game:{source}:{game}"
+
+def _encode_shared(period, history, slot, fetched_at, token=None):
+    if not isinstance(history, DrawHistory):
+        history = DrawHistory.from_rows(history)
+    return json.dumps({"slot": slot, "period": period, "fetched_at": fetched_at, "token": token,
+                       "periods": list(history.periods), "results": list(history.results)})
+
+def _decode_shared(raw):
+    data = json.loads(raw)
+    history = DrawHistory(array('q', data["periods"]), bytearray(data["results"]))
+    return data["slot"], data["period"], history, data.get("fetched_at"), data.get("token")
+
+def _load_shared(game_type, platform, min_period=None):
+    """The current draw's data from the shared tier, stored locally, or None."""
+    raw = get_backend().get(_shared_key(game_type, platform))
+    if raw is None: return None
+    slot, period, history, fetched_at, _ = _decode_shared(raw)
+    if slot != draw_slot(game_type): return None
+    if min_period and int(period) < min_period: return None
+    # The leader's fetch time, not ours: we only read its result later.
+    store_game_data(game_type, platform, period, history, fetched_at)
+    return period, history
+
+def _load_result(game_type, platform, lock_key):
+    """
+    What the current holder of `lock_key` fetched, stored locally, or None
+    while it is still fetching. Taken as is, even when the period is
+    still the old one (or missing): the follower must not refetch.
+    """
+    backend = get_backend()
+    raw = backend.get(f"result:{lock_key}")
+    if raw is None: return None
+    slot, period, history, fetched_at, token = _decode_shared(raw)
+    holder = backend.get(lock_key)
+    if isinstance(holder, bytes): holder = holder.decode()
+    if holder is not None and holder != token:
+        return None  # left by an earlier leader of the same key
+    if period:
+        store_game_data(game_type, platform, period, history, fetched_at)
+    return period, history
+
+def _publish_shared(game_type, platform, period, history, fetched_at, lock_key, token):
+    backend = get_backend()
+    slot = draw_slot(game_type)
+    if period:
+        backend.set(_shared_key(game_type, platform), _encode_shared(period, history, slot, fetched_at),
+                    ttl=GAME_INTERVALS[cache_key(game_type, platform)[1]] * 2)
+    backend.set(f"result:{lock_key}", _encode_shared(period, history, slot, fetched_at, token),
+                ttl=SHARED_WAIT * 2)
+
+def _fetch_and_store(game_type, platform, lock_key=None, token=None):
+    """Direct upstream fetch; a lock holder passes its key and token to publish the result."""
+    period, history, fetched_at = _fetch_game_data(game_type, platform)
+    store_game_data(game_type, platform, period, history, fetched_at)
+    if lock_key:
+        _publish_shared(game_type, platform, period, history, fetched_at, lock_key, token)
+    return period, history
+
+def refresh_game_data(game_type="30s", platform="Tiranga", min_period=None):
+    """
+    Fetches and stores fresh data. With a shared backend, data another
+    worker published for this draw is reused unless it is older than
+    `min_period` (the poller's retry burst asks for the next period).
+    """
+    backend = get_backend()
+    if not backend.is_shared:
+        return _fetch_and_store(game_type, platform)
+
+    try:
+        shared = _load_shared(game_type, platform, min_period)
+        if shared: return shared
+        lock_key = f"lock:{_shared_key(game_type, platform)}:{draw_slot(game_type)}:{min_period or ''}"
+        token = backend.acquire(lock_key, ttl=SHARED_WAIT * 2)
     except Exception as e:
-        logger.error(f"Critical API Error ({platform}): {e}")
-        return None, []
+        logger.error(f"Shared state unavailable, fetching directly: {e}")
+        return _fetch_and_store(game_type, platform)
+
+    if token:
+        try:
+            return _fetch_and_store(game_type, platform, lock_key, token)
+        finally:
+            try: backend.release(lock_key, token)
+            except Exception: pass
+
+    # Follower: wait for the leader's result (fresh data published by any
+    # worker also does), then fall back to fetching.
+    deadline = time.time() + SHARED_WAIT
+    while time.time() < deadline:
+        time.sleep(0.05)
+        try:
+            shared = _load_shared(game_type, platform, min_period) or _load_result(game_type, platform, lock_key)
+        except Exception:
+            break
+        if shared: return shared
+    return _fetch_and_store(game_type, platform)
+
+def get_cached_game_data(game_type="30s", platform="Tiranga"):
+    """
+    Same contract as get_game_data, but served from memory until the
+    next draw is due. Concurrent misses share a single upstream fetch.
+    """
+    key = cache_key(game_type, platform)
+    with _cache_lock:
+        entry = _cache.get(key)
+        if entry and entry[0] > time.time():
+            GAME_CACHE.inc(key[0], key[1], "hit")
+            return entry[1], entry[2]
+        flight = _inflight.get(key)
+        leader = flight is None
+        if leader:
+            flight = _inflight[key] = _Flight()
+
+    GAME_CACHE.inc(key[0], key[1], "miss" if leader else "coalesced")
+    if not leader:
+        flight.event.wait(timeout=15)
+        return flight.result
+
+    try:
+        flight.result = refresh_game_data(game_type, platform)
+        if not flight.result[0] and entry:
+            # Upstream down (or circuit open): keep serving the last draw.
+            flight.result = (entry[1], entry[2])
+    finally:
+        with _cache_lock:
+            _inflight.pop(key, None)
+        flight.event.set()
+    return flight.result
+
+# --- ASYNC CLIENT (ASGI mode) ---
+# httpx is only needed when serving through asgi.py, so import it lazily.
+
+_async_clients = {}
+_async_inflight = {}
+
+def get_async_client(platform="Tiranga"):
+    import httpx
+    source = _source(platform)
+    client = _async_clients.get(source)
+    if client is None:
+        client = httpx.AsyncClient(
+            headers=get_headers(platform),
+            timeout=httpx.Timeout(HTTP_READ_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT),
+            limits=httpx.Limits(max_connections=HTTP_POOL_SIZE * 10, max_keepalive_connections=HTTP_POOL_SIZE),
+        )
+        _async_clients[source] = client
+    return client
+
+async def _async_http_get(platform, url, headers=None):
+    """Async _http_get; the caller checks breaker.allow() once per fetch."""
+    import asyncio
+    import httpx
+    breaker = _breakers[_source(platform)]
+
+    client = get_async_client(platform)
+    last_error = None
+    for attempt in range(HTTP_RETRIES + 1):
+        if attempt:
+            await asyncio.sleep(HTTP_BACKOFF * (2 ** (attempt - 1)) + random.uniform(0, HTTP_BACKOFF))
+        try:
+            resp = await client.get(url, headers=headers)
+            if resp.status_code < 500:
+                breaker.record_success()
+                return resp
+            last_error = httpx.HTTPStatusError(f"HTTP {resp.status_code}", request=resp.request, response=resp)
+        except (httpx.ConnectError, httpx.ConnectTimeout, httpx.RemoteProtocolError) as e:
+            last_error = e
+        except httpx.HTTPError as e:
+            last_error = e  # read timeouts are not retried, as in _http_get
+            break
+    breaker.record_failure()
+    raise last_error
+
+async def async_get_game_data(game_type="30s", platform="Tiranga"):
+    """Async twin of get_game_data; both fetches run concurrently."""
+    return (await _async_fetch_game_data(game_type, platform))[:2]
+
+async def _async_fetch_game_data(game_type, platform):
+    """Async twin of _fetch_game_data."""
+    import asyncio
+    source, game = cache_key(game_type, platform)
+    # One allow() for both requests: they start together, so in half-open
+    # state a per-request check would re-arm the breaker on the first and
+    # always refuse the second.
+    if not _breakers[source].allow():
+        UPSTREAM_ERRORS.inc(source, game, "circuit_open")
+        return None, [], None
+
+    async def timed_get(endpoint, url):
+        with UPSTREAM_LATENCY.time(source, game, endpoint):
+            resp = await _async_http_get(platform, url, headers=headers)
+        return resp, time.time()
+
+    urls, headers, url_suffix = _request_plan(game_type, platform)
+    curr, hist = await asyncio.gather(
+        timed_get("current", urls["current"] + url_suffix),
+        timed_get("history", urls["history"] + url_suffix),
+        return_exceptions=True,
+    )
+
+    current_period = None
+    current_at = None
+    clean_history = []
+    try:
+        if isinstance(curr, Exception): raise curr
+        curr, arrived_at = curr
+        with UPSTREAM_PARSE.time(source, "current"):
+            current_period = decode_current(curr.content)
+        if current_period: current_at = arrived_at
+    except Exception as e:
+        UPSTREAM_ERRORS.inc(source, game, "current")
+        logger.error(f"Error fetching current ({platform}): {e}")
+    try:
+        if isinstance(hist, Exception): raise hist
+        with UPSTREAM_PARSE.time(source, "history"):
+            clean_history = decode_history(hist[0].content)
+    except Exception as e:
+        UPSTREAM_ERRORS.inc(source, game, "history")
+        logger.error(f"Error fetching history ({platform}): {e}")
+
+    return (*_finish(current_period, clean_history), current_at)
+
+async def _async_fetch_and_store(game_type, platform):
+    period, history, fetched_at = await _async_fetch_game_data(game_type, platform)
+    store_game_data(game_type, platform, period, history, fetched_at)
+    return period, history
+
+async def async_get_cached_game_data(game_type="30s", platform="Tiranga"):
+    """Async twin of get_cached_game_data, sharing the same cache."""
+    import asyncio
+    key = cache_key(game_type, platform)
+    with _cache_lock:
+        entry = _cache.get(key)
+    if entry and entry[0] > time.time():
+        GAME_CACHE.inc(key[0], key[1], "hit")
+        return entry[1], entry[2]
+
+    if get_backend().is_shared:
+        # Leader election waits on the backend, so run it off the loop.
+        return await asyncio.to_thread(get_cached_game_data, game_type, platform)
+
+    task = _async_inflight.get(key)
+    GAME_CACHE.inc(key[0], key[1], "miss" if task is None else "coalesced")
+    if task is None:
+        task = asyncio.ensure_future(_async_fetch_and_store(game_type, platform))
+        _async_inflight[key] = task
+        task.add_done_callback(lambda _: _async_inflight.pop(key, None))
+
+    period, history = await asyncio.shield(task)
+    if not period and entry:
+        return entry[1], entry[2]
+    return period, history
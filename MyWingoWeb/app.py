@@ -1,45 +1,251 @@
-from flask import Flask, render_template, jsonify, request
-from api_helper import get_game_data
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from flask import Flask, Response, render_template, jsonify, request
+from api_helper import get_cached_game_data, get_latest_game_data, get_trend_state, next_draw_at, cache_key
 from prediction_engine import get_v5_logic
-from config import V5_SALT, TRUSTWIN_SALT
+from config import (V5_SALT, TRUSTWIN_SALT, POLLER_ENABLED, RESPONSE_CACHE_SIZE, BATCH_MAX_ITEMS,
+                    configure_logging)
+from poller import poller, start_poller
+from stream import PredictionHub
+from shared_state import get_backend
+from metrics import REGISTRY, start_snapshots
+from admission import limiter, coalescer, client_id, retry_after, make_etag, etag_matches
+import fastjson
 
 app = Flask(__name__)
 
+PREDICT_PHASE = REGISTRY.histogram(
+    "wingo_predict_phase_seconds", "/api/predict time by phase (fetch, engine, serialize).", ("phase",))
+REQUESTS = REGISTRY.counter("wingo_http_requests_total", "HTTP requests by endpoint and status.", ("endpoint", "status"))
+
+# Start ingestion once per serving process (skip the debug reloader's parent).
+if POLLER_ENABLED and (__name__ != '__main__' or os.environ.get("WERKZEUG_RUN_MAIN") == "true"):
+    start_poller()
+
+# With METRICS_DIR set (gunicorn.conf.py), publish this worker's series so
+# /metrics on any worker reports the totals of all of them.
+start_snapshots()
+
+def load_game_data(game_time, platform):
+    # With the poller running, requests only read local state.
+    if poller.is_running():
+        period, history = get_latest_game_data(game_time, platform=platform)
+        if period: return period, history
+    return get_cached_game_data(game_time, platform=platform)
+
+# --- REQUEST VALIDATION ---
+# platform and time end up in cache keys (local and shared) and stream
+# channels, so only known values are accepted. Matching ignores case:
+# the page sends "Rajagames".
+PLATFORMS = {p.lower(): p for p in ("Tiranga", "RajaGames", "TrustWin")}
+GAME_TIMES = {"30s": "30s", "1m": "1m"}
+
+def normalize_target(platform, game_time):
+    """Canonical (platform, time), or None if either is unknown."""
+    platform = PLATFORMS.get(str(platform).lower())
+    game_time = GAME_TIMES.get(str(game_time).lower())
+    if platform is None or game_time is None: return None
+    return platform, game_time
+
+BAD_TARGET = {"status": "error", "message": "Unknown platform or time"}
+
 # Route for the Home Page
 @app.route('/')
 def home():
     return render_template('index.html')
 
-# API Endpoint that the website calls to get a prediction
-@app.route('/api/predict', methods=['POST'])
-def predict():
-    data = request.json
-    platform = data.get('platform', 'Tiranga')
-    game_time = data.get('time', '30s') # "30s" or "1m"
+def build_prediction(platform, game_time, period, history):
+    """Response payload for one (platform, time) at `period`."""
+    trend = get_trend_state(game_time, platform)
+    pred, pattern, digit = get_v5_logic(period, game_time, trend or history, platform=platform)
     
-    # 1. Fetch Data using your existing helper
-    period, history = get_game_data(game_time, platform=platform)
-    
-    if not period:
-        return jsonify({"status": "error", "message": "API Error"}), 500
-
-    # 2. Get Logic using your existing engine
-    pred, pattern, digit = get_v5_logic(period, game_time, history, platform=platform)
-    
-    # 3. Format History for Display (Last 6 outcomes)
+    # Format History for Display (Last 6 outcomes)
     trend_ui = []
     if history:
         for h in history[:6]: # Get recent 6
             trend_ui.append("🔴" if h['o'] == "Big" else "🟢")
     
-    return jsonify({
+    return {
         "status": "success",
         "period": period,
         "prediction": pred,       # "Big" or "Small"
         "color": "red" if pred == "Big" else "green",
         "pattern": pattern,
-        "trend": trend_ui
-    })
+        "trend": trend_ui,
+        "next_draw_at": round(next_draw_at(game_time, platform=platform), 3)  # epoch seconds
+    }
+
+# Serialized responses per (platform, time, period): a repeat request for
+# the current draw is a dict lookup, with no engine call and no encoding.
+_response_cache = OrderedDict()
+_response_lock = threading.Lock()
+
+def get_prediction_body(platform, game_time, period, history):
+    """build_prediction as JSON bytes, computed once per period across all workers."""
+    key = f"pred:{platform}:{'30s' if game_time == '30s' else '1m'}:{period}"
+    with _response_lock:
+        body = _response_cache.get(key)
+    if body is not None: return body
+
+    backend = get_backend()
+    try:
+        body = backend.get(key)
+    except Exception as e:
+        app.logger.warning(f"Prediction cache read failed: {e}")
+    if body is None:
+        body = fastjson.dumps(build_prediction(platform, game_time, period, history))
+        try:
+            backend.set(key, body, ttl=120)
+        except Exception as e:
+            app.logger.warning(f"Prediction cache write failed: {e}")
+    elif isinstance(body, str):
+        body = body.encode("utf-8")
+
+    with _response_lock:
+        _response_cache[key] = body
+        while len(_response_cache) > RESPONSE_CACHE_SIZE:
+            _response_cache.popitem(last=False)
+    return body
+
+def get_prediction(platform, game_time, period, history):
+    """get_prediction_body, decoded."""
+    return fastjson.loads(get_prediction_body(platform, game_time, period, history))
+
+def predict_body(platform, game_time):
+    """(period, JSON bytes) for one (platform, time), or (None, None) on upstream failure."""
+    # 1. Fetch Data (poller state, or cached until the next draw)
+    with PREDICT_PHASE.time("fetch"):
+        period, history = load_game_data(game_time, platform)
+    if not period: return None, None
+
+    # 2. Get Logic using your existing engine
+    with PREDICT_PHASE.time("engine"):
+        return period, get_prediction_body(platform, game_time, period, history)
+
+# API Endpoint that the website calls to get a prediction
+# (GET for conditional requests, POST for existing clients)
+@app.route('/api/predict', methods=['GET', 'POST'])
+def predict():
+    wait = limiter.check(client_id(request.remote_addr, request.headers.get('X-Forwarded-For')))
+    if wait:
+        REQUESTS.inc("predict", "429")
+        return jsonify({"status": "error", "message": "Too Many Requests"}), 429, {"Retry-After": retry_after(wait)}
+
+    data = request.args if request.method == 'GET' else request.get_json(silent=True)
+    if data is None: data = {}  # no (or malformed) body: defaults, as before
+    if not isinstance(data, dict):
+        REQUESTS.inc("predict", "400")
+        return jsonify({"status": "error", "message": "Bad Request"}), 400
+    target = normalize_target(data.get('platform', 'Tiranga'), data.get('time', '30s'))
+    if target is None:
+        REQUESTS.inc("predict", "400")
+        return jsonify(BAD_TARGET), 400
+    platform, game_time = target
+
+    # Identical concurrent requests share one fetch + build
+    period, body = coalescer.run((platform, game_time), lambda: predict_body(platform, game_time))
+    if not period:
+        REQUESTS.inc("predict", "500")
+        return jsonify({"status": "error", "message": "API Error"}), 500
+
+    etag = make_etag(platform, game_time, period)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_matches(request.headers.get('If-None-Match'), etag):
+        REQUESTS.inc("predict", "304")
+        return Response(status=304, headers=headers)
+    with PREDICT_PHASE.time("serialize"):
+        response = Response(body, mimetype='application/json', headers=headers)
+    REQUESTS.inc("predict", "200")
+    return response
+
+# --- BATCH ---
+# Several (platform, time) pairs in one request: game data is fetched once
+# per upstream source, all sources at the same time.
+_batch_pool = ThreadPoolExecutor(max_workers=BATCH_MAX_ITEMS, thread_name_prefix="batch")
+BATCH_ERROR = fastjson.dumps({"status": "error", "message": "API Error"})
+BATCH_BAD_REQUEST = f"Expected 1-{BATCH_MAX_ITEMS} items with a known platform and time"
+
+def parse_batch(data):
+    """[(platform, time), ...] from {"items": [...]} or a bare list, or None if invalid."""
+    items = data.get('items') if isinstance(data, dict) else data
+    if not isinstance(items, list) or not 0 < len(items) <= BATCH_MAX_ITEMS: return None
+    pairs = []
+    for item in items:
+        if not isinstance(item, dict): return None
+        target = normalize_target(item.get('platform', 'Tiranga'), item.get('time', '30s'))
+        if target is None: return None
+        pairs.append(target)
+    return pairs
+
+def batch_sources(pairs):
+    """{cache_key: (platform, time)}: one representative request per upstream source."""
+    sources = {}
+    for platform, game_time in pairs:
+        sources.setdefault(cache_key(game_time, platform), (platform, game_time))
+    return sources
+
+def batch_body(pairs, game_data):
+    """
+    Joins each item's cached prediction bytes, in request order, into
+    {"status": "success", "results": [...]}; failed items carry their own
+    error status. game_data maps cache_key -> (period, history).
+    """
+    parts = []
+    for platform, game_time in pairs:
+        period, history = game_data.get(cache_key(game_time, platform), (None, None))
+        parts.append(get_prediction_body(platform, game_time, period, history) if period else BATCH_ERROR)
+    return b'{"status":"success","results":[' + b",".join(parts) + b"]}"
+
+@app.route('/api/predict/batch', methods=['POST'])
+def predict_batch():
+    wait = limiter.check(client_id(request.remote_addr, request.headers.get('X-Forwarded-For')))
+    if wait:
+        REQUESTS.inc("predict_batch", "429")
+        return jsonify({"status": "error", "message": "Too Many Requests"}), 429, {"Retry-After": retry_after(wait)}
+
+    pairs = parse_batch(request.get_json(silent=True))
+    if pairs is None:
+        REQUESTS.inc("predict_batch", "400")
+        return jsonify({"status": "error", "message": BATCH_BAD_REQUEST}), 400
+
+    with PREDICT_PHASE.time("fetch"):
+        sources = batch_sources(pairs)
+        futures = {key: _batch_pool.submit(load_game_data, game_time, platform)
+                   for key, (platform, game_time) in sources.items()}
+        game_data = {}
+        for key, future in futures.items():
+            try:
+                game_data[key] = future.result()
+            except Exception as e:
+                app.logger.error(f"Batch fetch failed ({key}): {e}")
+    with PREDICT_PHASE.time("engine"):
+        body = batch_body(pairs, game_data)
+    REQUESTS.inc("predict_batch", "200")
+    return Response(body, mimetype='application/json')
+
+hub = PredictionHub(build_prediction)
+
+# Prometheus scrape endpoint
+@app.route('/metrics')
+def metrics():
+    return Response(REGISTRY.render(), mimetype='text/plain; version=0.0.4')
+
+# Server-Sent Events: one push per draw instead of one POST per click
+# (WSGI mode; asgi.py serves this route on the event loop)
+@app.route('/api/stream')
+def stream():
+    target = normalize_target(request.args.get('platform', 'Tiranga'), request.args.get('time', '30s'))
+    if target is None:
+        return jsonify(BAD_TARGET), 400
+    platform, game_time = target
+    return Response(
+        hub.events(platform, game_time),
+        mimetype='text/event-stream',
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 if __name__ == '__main__':
+    configure_logging()
     app.run(debug=True, port=5000)
\ No newline at end of file
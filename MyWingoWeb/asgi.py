@@ -0,0 +1,186 @@
+"""
+ASGI entry point: `/api/predict` (and its batch form) and `/api/stream`
+run natively on the event loop (async upstream fetches via httpx),
+everything else is served by the Flask app.
+
+    gunicorn -c gunicorn.conf.py asgi:application
+"""
+import asyncio
+import logging
+from urllib.parse import parse_qs
+from asgiref.wsgi import WsgiToAsgi
+from app import (app, hub, get_prediction_body, parse_batch, batch_sources, batch_body, normalize_target,
+                 BAD_TARGET, BATCH_BAD_REQUEST, PREDICT_PHASE, REQUESTS)
+import fastjson
+from api_helper import async_get_cached_game_data, get_latest_game_data, _async_clients
+from poller import poller
+from admission import limiter, client_id, retry_after, make_etag, etag_matches
+from shared_state import get_backend
+
+logger = logging.getLogger(__name__)
+
+flask_app = WsgiToAsgi(app)
+
+async def _read_body(receive):
+    body = b""
+    more = True
+    while more:
+        message = await receive()
+        body += message.get("body", b"")
+        more = message.get("more_body", False)
+    return body
+
+async def _send_json(send, payload, status=200, headers=()):
+    await _send_body(send, fastjson.dumps(payload), status, headers)
+
+async def _send_body(send, body, status=200, headers=()):
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode()),
+                    *headers],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+def _header(scope, name):
+    for key, value in scope["headers"]:
+        if key == name: return value.decode("latin-1")
+    return None
+
+async def _off_loop_if_shared(fn, *args):
+    # The shared backend (redis-py) blocks on the network: keep it off the loop.
+    if get_backend().is_shared:
+        return await asyncio.to_thread(fn, *args)
+    return fn(*args)
+
+async def predict(scope, receive, send):
+    client = scope.get("client")
+    wait = limiter.check(client_id(client[0] if client else None, _header(scope, b"x-forwarded-for")))
+    if wait:
+        REQUESTS.inc("predict", "429")
+        return await _send_json(send, {"status": "error", "message": "Too Many Requests"}, 429,
+                                [(b"retry-after", retry_after(wait).encode())])
+
+    if scope["method"] == "GET":
+        data = {k: v[0] for k, v in parse_qs(scope.get("query_string", b"").decode()).items()}
+    else:
+        try:
+            data = fastjson.loads(await _read_body(receive) or b"{}")
+        except ValueError:
+            data = None
+        if not isinstance(data, dict):  # malformed, or valid JSON that is not an object
+            REQUESTS.inc("predict", "400")
+            return await _send_json(send, {"status": "error", "message": "Bad Request"}, 400)
+    target = normalize_target(data.get('platform', 'Tiranga'), data.get('time', '30s'))
+    if target is None:
+        REQUESTS.inc("predict", "400")
+        return await _send_json(send, BAD_TARGET, 400)
+    platform, game_time = target
+
+    # Concurrent requests share the async fetch in-flight; the build is sync,
+    # so nothing else runs on the loop meanwhile.
+    period, history = None, []
+    with PREDICT_PHASE.time("fetch"):
+        if poller.is_running():
+            period, history = get_latest_game_data(game_time, platform=platform)
+        if not period:
+            period, history = await async_get_cached_game_data(game_time, platform=platform)
+
+    if not period:
+        REQUESTS.inc("predict", "500")
+        return await _send_json(send, {"status": "error", "message": "API Error"}, 500)
+
+    etag = make_etag(platform, game_time, period)
+    headers = [(b"etag", etag.encode()), (b"cache-control", b"no-cache")]
+    if etag_matches(_header(scope, b"if-none-match"), etag):
+        REQUESTS.inc("predict", "304")
+        await send({"type": "http.response.start", "status": 304, "headers": headers})
+        return await send({"type": "http.response.body", "body": b""})
+    with PREDICT_PHASE.time("engine"):
+        body = await _off_loop_if_shared(get_prediction_body, platform, game_time, period, history)
+    REQUESTS.inc("predict", "200")
+    await _send_body(send, body, 200, headers)
+
+async def predict_batch(scope, receive, send):
+    client = scope.get("client")
+    wait = limiter.check(client_id(client[0] if client else None, _header(scope, b"x-forwarded-for")))
+    if wait:
+        REQUESTS.inc("predict_batch", "429")
+        return await _send_json(send, {"status": "error", "message": "Too Many Requests"}, 429,
+                                [(b"retry-after", retry_after(wait).encode())])
+    try:
+        pairs = parse_batch(fastjson.loads(await _read_body(receive) or b"null"))
+    except ValueError:
+        pairs = None
+    if pairs is None:
+        REQUESTS.inc("predict_batch", "400")
+        return await _send_json(send, {"status": "error", "message": BATCH_BAD_REQUEST}, 400)
+
+    async def load(platform, game_time):
+        if poller.is_running():
+            period, history = get_latest_game_data(game_time, platform=platform)
+            if period: return period, history
+        return await async_get_cached_game_data(game_time, platform=platform)
+
+    with PREDICT_PHASE.time("fetch"):
+        sources = batch_sources(pairs)
+        results = await asyncio.gather(*(load(p, t) for p, t in sources.values()), return_exceptions=True)
+        game_data = {key: r for key, r in zip(sources, results) if not isinstance(r, BaseException)}
+    with PREDICT_PHASE.time("engine"):
+        body = await _off_loop_if_shared(batch_body, pairs, game_data)
+    REQUESTS.inc("predict_batch", "200")
+    await _send_body(send, body)
+
+async def _until_disconnect(receive):
+    while (await receive())["type"] != "http.disconnect":
+        pass
+
+async def stream(scope, receive, send):
+    """SSE natively on the loop, so open streams don't hold the Flask thread."""
+    params = {k: v[0] for k, v in parse_qs(scope.get("query_string", b"").decode()).items()}
+    target = normalize_target(params.get('platform', 'Tiranga'), params.get('time', '30s'))
+    if target is None:
+        return await _send_json(send, BAD_TARGET, 400)
+    events = hub.async_events(*target)
+    disconnected = asyncio.ensure_future(_until_disconnect(receive))
+    await send({
+        "type": "http.response.start",
+        "status": 200,
+        "headers": [(b"content-type", b"text/event-stream"), (b"cache-control", b"no-cache"),
+                    (b"x-accel-buffering", b"no")],
+    })
+    try:
+        while True:
+            chunk = asyncio.ensure_future(events.__anext__())
+            await asyncio.wait({chunk, disconnected}, return_when=asyncio.FIRST_COMPLETED)
+            if not chunk.done():
+                chunk.cancel()
+                await asyncio.wait({chunk})  # let the generator unwind before aclose()
+                break
+            await send({"type": "http.response.body", "body": chunk.result().encode(), "more_body": True})
+    finally:
+        disconnected.cancel()
+        await events.aclose()
+
+async def lifespan(scope, receive, send):
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            for client in list(_async_clients.values()):
+                await client.aclose()
+            _async_clients.clear()
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+async def application(scope, receive, send):
+    if scope["type"] == "lifespan":
+        return await lifespan(scope, receive, send)
+    if scope["type"] == "http" and scope["path"] == "/api/predict" and scope["method"] in ("GET", "POST"):
+        return await predict(scope, receive, send)
+    if scope["type"] == "http" and scope["path"] == "/api/predict/batch" and scope["method"] == "POST":
+        return await predict_batch(scope, receive, send)
+    if scope["type"] == "http" and scope["path"] == "/api/stream" and scope["method"] == "GET":
+        return await stream(scope, receive, send)
+    return await flask_app(scope, receive, send)
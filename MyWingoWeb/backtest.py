@@ -0,0 +1,272 @@
+"""
+Vectorized back-test of the V1-V5 engines over stored draw history.
+
+Every mode is replayed over the whole history at once: outcomes are a
+NumPy 0/1 array (1 = Big), streak and zigzag lengths are rolling run
+lengths, V5 hash digits are computed in one batch, and BETTING_SEQUENCE
+martingale levels come from the running loss streak. Only V4, whose
+prediction depends on its own level, keeps a per-draw loop.
+
+Each prediction at draw i sees draws [0, i), the same view TrendState
+gives the live engines.
+
+    cd MyWingoWeb
+    python backtest.py draws.csv --platform Tiranga --time 30s
+    python backtest.py draws.csv --modes V1,V5 --platform Tiranga,TrustWin --workers 4
+
+History files are draw_store .bin files, CSV (period,number) or
+JSON/JSON-lines rows with p/r or upstream issueNumber/number fields, in
+any order.
+
+    python backtest.py data/Common_30s.bin
+"""
+import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from config import BETTING_SEQUENCE, MAX_LEVEL, PATTERN_LENGTH
+from trend_state import _PATTERN_TABLE, BIG
+from prediction_engine import get_salt
+from draw_store import get_store
+
+MODES = ("V1", "V2", "V3", "V4", "V5")
+
+# _PATTERN_TABLE as int8: 1 = Big, 0 = Small, -1 = no pattern
+_PATTERN_CODES = np.array([-1 if p is None else int(p == BIG) for p, _ in _PATTERN_TABLE], dtype=np.int8)
+
+# --- LOADING ---
+
+def _from_pairs(pairs):
+    periods = np.fromiter((int(p) for p, _ in pairs), dtype=np.int64, count=len(pairs))
+    results = np.fromiter((int(r) for _, r in pairs), dtype=np.int8, count=len(pairs))
+    return _sorted(periods, results)
+
+def _row_pair(row):
+    if 'p' in row: return row['p'], row['r']
+    return row['issueNumber'], row['number']
+
+def _sorted(periods, results):
+    order = np.argsort(periods, kind="stable")
+    return periods[order], results[order]
+
+def load_history(path):
+    """(periods int64, results int8) sorted oldest first."""
+    if path.endswith(".bin"):
+        # draw_store file: already sorted, one read (a torn last record is skipped)
+        dtype = np.dtype([("p", "<i8"), ("r", "u1")])
+        records = np.fromfile(path, dtype=dtype, count=os.path.getsize(path) // dtype.itemsize)
+        return records["p"].copy(), records["r"].astype(np.int8)
+    with open(path, newline="") as f:
+        if path.endswith(".csv"):
+            # Two integer columns: tokenize the whole file in one pass
+            tokens = f.read().replace(",", " ").split()
+            if tokens and not tokens[0].isdigit(): tokens = tokens[2:]
+            table = np.array(tokens, dtype=np.int64).reshape(-1, 2)
+            return _sorted(table[:, 0].copy(), table[:, 1].astype(np.int8))
+        if path.endswith(".jsonl"):
+            pairs = [_row_pair(json.loads(line)) for line in f if line.strip()]
+        else:
+            data = json.load(f)
+            if isinstance(data, dict): data = data.get("data", {}).get("list", [])
+            pairs = [_row_pair(row) for row in data]
+    return _from_pairs(pairs)
+
+def load_history_from_store(platform="Tiranga", game_type="30s"):
+    """Same as load_history, from the local draw store (see draw_store.py)."""
+    from api_helper import cache_key
+    return load_history(get_store(*cache_key(game_type, platform)).path)
+
+def load_history_from_mongo(collection="draws", query=None):
+    """Same as load_history, from {p, r} documents in `collection`."""
+    from database import get_collection
+    coll = get_collection(collection)
+    if coll is None: return _from_pairs([])
+    return _from_pairs([(d['p'], d['r']) for d in coll.find(query or {}, {'_id': 0, 'p': 1, 'r': 1})])
+
+# --- FEATURES ---
+
+def _run_lengths(flags):
+    """Length of the run of True ending at each index (0 where False)."""
+    idx = np.arange(1, len(flags) + 1)
+    last_false = np.maximum.accumulate(np.where(flags, 0, idx))
+    return idx - last_false
+
+def trend_features(big):
+    """
+    Per draw i (state after draw i): streak and alternation lengths as
+    TrendState.push tracks them.
+    """
+    same = np.zeros(len(big), dtype=bool)
+    same[1:] = big[1:] == big[:-1]
+    diff = np.zeros(len(big), dtype=bool)
+    diff[1:] = ~same[1:]
+    return _run_lengths(same) + 1, _run_lengths(diff) + 1
+
+def hash_digits(periods, salt):
+    """V5 hash digit (last decimal digit of the SHA-256 hex) for every period."""
+    n = len(periods)
+    if not n: return np.zeros(0, dtype=np.int8)
+    salt = salt.encode()
+    sha = hashlib.sha256
+    hexes = b"".join(sha(b"%d" % p + salt).hexdigest().encode() for p in periods.tolist())
+    chars = np.frombuffer(hexes, dtype=np.uint8).reshape(n, 64)
+    is_digit = chars <= ord("9")
+    last = 63 - np.argmax(is_digit[:, ::-1], axis=1)
+    digits = chars[np.arange(n), last].astype(np.int8) - ord("0")
+    digits[~is_digit.any(axis=1)] = 0
+    return digits
+
+def _previous(values, first):
+    """values shifted one draw later, so index i holds the value after draw i - 1."""
+    out = np.empty_like(values)
+    out[0] = first
+    out[1:] = values[:-1]
+    return out
+
+# --- ENGINES ---
+
+def predict_v1(big, rng):
+    n = len(big)
+    code = np.zeros(n, dtype=np.int64)
+    for k in range(1, PATTERN_LENGTH + 1):
+        # bit k-1 holds the outcome k draws back
+        code[k:] |= big[:-k].astype(np.int64) << (k - 1)
+    window = np.minimum(np.arange(n), PATTERN_LENGTH)
+    code &= (1 << window) - 1
+    pred = _PATTERN_CODES[(1 << window) | code]
+    # Fallback: V1 Streak (last outcome), then V1 Random for the first draw
+    fallback = _previous(big, rng.integers(0, 2))
+    return np.where(pred < 0, fallback, pred).astype(np.int8)
+
+def predict_v2(big, first="Small"):
+    # Win keeps the prediction and a loss flips it, so V2 always ends up
+    # calling the previous outcome.
+    return _previous(big, int(first == BIG)).astype(np.int8)
+
+def predict_v3(big, rng):
+    return (rng.integers(0, 10, len(big)) > 4).astype(np.int8)
+
+def predict_v5(big, periods, platform, streak=None, alternation=None):
+    if streak is None: streak, alternation = trend_features(big)
+    n = len(big)
+    count = np.arange(n)
+    last = _previous(big, 0)
+    prev_streak = _previous(streak, 0)
+    prev_alt = _previous(alternation, 0)
+
+    hash_pred = (hash_digits(periods, get_salt(platform)) > 4).astype(np.int8)
+    # get_high_confidence_prediction: needs 10 draws, streak of 4 or ABAB
+    trend = np.full(n, -1, dtype=np.int8)
+    trend[(count >= 10) & (prev_alt >= 4)] = 1 - last[(count >= 10) & (prev_alt >= 4)]
+    trend[(count >= 10) & (prev_streak >= 4)] = last[(count >= 10) & (prev_streak >= 4)]
+    # A super trend (5+ streak) overrides a disagreeing hash
+    override = (trend >= 0) & (trend != hash_pred) & (prev_streak >= np.minimum(5, count)) & (count > 0)
+    return np.where(override, trend, hash_pred).astype(np.int8)
+
+def simulate_levels(wins):
+    """Martingale level per bet: +1 per loss, back to 1 on a win or after MAX_LEVEL."""
+    losses_before = _previous(_run_lengths(~wins), 0)
+    return (losses_before % MAX_LEVEL + 1).astype(np.int8)
+
+def simulate_v4(big, streak, first="Small"):
+    """V4 switches on its own level, so prediction and martingale run together."""
+    n = len(big)
+    pred = np.empty(n, dtype=np.int8)
+    levels = np.empty(n, dtype=np.int8)
+    outcomes = big.tolist()
+    strong = (streak >= 3).tolist()
+    current = int(first == BIG)
+    level = 1
+    for i in range(n):
+        if i and level != 4 and strong[i - 1]:
+            current = outcomes[i - 1]
+        else:
+            current = 1 - current
+        pred[i] = current
+        levels[i] = level
+        level = 1 if current == outcomes[i] or level >= MAX_LEVEL else level + 1
+    return pred, levels
+
+# --- REPORT ---
+
+def score(pred, big, levels=None, payout=1.0):
+    wins = pred == big
+    if levels is None: levels = simulate_levels(wins)
+    stakes = np.asarray(BETTING_SEQUENCE, dtype=np.int64)[levels - 1]
+    won = int(stakes[wins].sum())
+    lost = int(stakes[~wins].sum())
+    n = len(big)
+    return {
+        "draws": n,
+        "wins": int(wins.sum()),
+        "win_rate": float(wins.mean()) if n else 0.0,
+        "max_level": int(levels.max()) if n else 0,
+        "busts": int((~wins & (levels == MAX_LEVEL)).sum()),
+        "staked_units": won + lost,
+        "net_units": won * payout - lost,
+    }
+
+def run_mode(mode, periods, results, platform="Tiranga", game_type="30s", seed=0, payout=1.0):
+    """Back-tests one engine over the history; returns a summary dict."""
+    start = time.perf_counter()
+    big = (np.asarray(results) > 4).astype(np.int8)
+    periods = np.asarray(periods, dtype=np.int64)
+    rng = np.random.default_rng(seed)
+    levels = None
+    if mode == "V1":
+        pred = predict_v1(big, rng)
+    elif mode == "V2":
+        pred = predict_v2(big)
+    elif mode == "V3":
+        pred = predict_v3(big, rng)
+    elif mode == "V4":
+        pred, levels = simulate_v4(big, trend_features(big)[0])
+    else:
+        pred = predict_v5(big, periods, platform)
+    report = score(pred, big, levels, payout)
+    report.update(platform=platform, game_type=game_type, mode=mode,
+                  seconds=round(time.perf_counter() - start, 3))
+    return report
+
+def _job(args):
+    return run_mode(*args)
+
+def run_all(periods, results, modes=MODES, platforms=("Tiranga",), game_types=("30s",), workers=None,
+            seed=0, payout=1.0):
+    """One task per (platform, game_type, mode), spread over `workers` processes."""
+    jobs = [(m, periods, results, p, g, seed, payout) for p in platforms for g in game_types for m in modes]
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(jobs) == 1:
+        return [_job(j) for j in jobs]
+    with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as pool:
+        return list(pool.map(_job, jobs))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Back-test the prediction engines.")
+    parser.add_argument("history", help="CSV / JSON / JSON-lines draw history")
+    parser.add_argument("--modes", default=",".join(MODES))
+    parser.add_argument("--platform", default="Tiranga", help="comma-separated")
+    parser.add_argument("--time", default="30s", help="comma-separated game types (labels only)")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0, help="RNG seed for V1 fallback and V3")
+    parser.add_argument("--payout", type=float, default=1.0, help="net units won per unit staked on a win")
+    args = parser.parse_args(argv)
+
+    periods, results = load_history(args.history)
+    reports = run_all(periods, results, args.modes.split(","), args.platform.split(","), args.time.split(","),
+                      args.workers, args.seed, args.payout)
+    print(f"{'platform':<10}{'time':<6}{'mode':<6}{'draws':>10}{'win %':>8}{'max lvl':>9}{'busts':>8}"
+          f"{'net units':>12}{'sec':>8}")
+    for r in reports:
+        print(f"{r['platform']:<10}{r['game_type']:<6}{r['mode']:<6}{r['draws']:>10}{r['win_rate'] * 100:>8.2f}"
+              f"{r['max_level']:>9}{r['busts']:>8}{r['net_units']:>12.1f}{r['seconds']:>8.2f}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
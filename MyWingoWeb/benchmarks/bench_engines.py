@@ -0,0 +1,62 @@
+"""
+Microbenchmarks for the prediction engines and trend helpers.
+
+    cd MyWingoWeb && python -m benchmarks.bench_engines
+"""
+import timeit
+import random
+
+import prediction_engine as pe
+from history import DrawHistory
+from trend_state import TrendState
+
+def _history(n=10, seed=7):
+    rng = random.Random(seed)
+    return DrawHistory.from_rows([{'p': str(20250000000000000 + i), 'r': rng.randint(0, 9)} for i in range(n)])
+
+def _rate(fn, number):
+    best = min(timeit.repeat(fn, number=number, repeat=5))
+    return best / number * 1e6
+
+def run(number=20000):
+    """Returns {name: microseconds per call}."""
+    rows = _history().to_rows()
+    columnar = _history()
+    trend = TrendState.from_history(rows)
+    outcomes = [x['o'] for x in rows]
+    periods = [str(20250000000000000 + i) for i in range(1000)]
+    pe.precompute_hash_digits(periods[0], count=1)
+    miss = iter(range(10**9))
+
+    cases = {
+        "get_v5_logic (table hit)": lambda: pe.get_v5_logic(periods[0], "30s", trend),
+        "get_v5_logic (list history)": lambda: pe.get_v5_logic(periods[0], "30s", rows),
+        "get_v5_logic (cold period)": lambda: pe.get_v5_logic(str(30250000000000000 + next(miss) * 64), "30s", trend),
+        "get_v5_batch (1000 periods)": lambda: pe.get_v5_batch(periods, "30s", trend),
+        "is_super_trend (list)": lambda: pe.is_super_trend(rows),
+        "is_super_trend (DrawHistory)": lambda: pe.is_super_trend(columnar),
+        "is_super_trend (TrendState)": lambda: pe.is_super_trend(trend),
+        "high_confidence (list)": lambda: pe.get_high_confidence_prediction(rows),
+        "high_confidence (DrawHistory)": lambda: pe.get_high_confidence_prediction(columnar),
+        "high_confidence (TrendState)": lambda: pe.get_high_confidence_prediction(trend),
+        "next_pattern (list)": lambda: pe.get_next_pattern_prediction(rows),
+        "next_pattern (DrawHistory)": lambda: pe.get_next_pattern_prediction(columnar),
+        "next_pattern (TrendState)": lambda: pe.get_next_pattern_prediction(trend),
+        "generate_v1_prediction": lambda: pe.generate_v1_prediction(rows, "Big", "win"),
+        "generate_v2_prediction": lambda: pe.generate_v2_prediction(rows, "Big", "loss", 2),
+        "generate_v3_prediction": lambda: pe.generate_v3_prediction(),
+        "generate_v4_prediction": lambda: pe.generate_v4_prediction(outcomes, "Big", "loss", 1),
+        "TrendState.push": lambda: trend.push("Big"),
+    }
+    results = {}
+    for name, fn in cases.items():
+        n = max(1, number // 100) if "batch" in name or "cold" in name else number
+        results[name] = _rate(fn, n)
+    return results
+
+def main():
+    for name, us in run().items():
+        print(f"{name:<34}{us:>10.2f} us/op")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+"""
+Cold-start cost of the web/engine modules.
+
+Each module is imported in a fresh interpreter so nothing is shared
+between runs. Reports the median wall time and peak RSS per import, and
+whether pymongo ended up loaded.
+
+    cd MyWingoWeb && python -m benchmarks.bench_import
+"""
+import os
+import sys
+import json
+import subprocess
+import statistics
+
+MODULES = ["config", "prediction_engine", "api_helper", "database", "app"]
+
+_PROBE = """
+import sys, time, json, resource
+t = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - t
+print(json.dumps({{
+    "seconds": elapsed,
+    "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    "pymongo_loaded": "pymongo" in sys.modules,
+}}))
+"""
+
+def measure(module, runs=5):
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, POLLER_ENABLED="0")
+    samples = []
+    for _ in range(runs):
+        out = subprocess.run(
+            [sys.executable, "-c", _PROBE.format(module=module)],
+            cwd=root, env=env, capture_output=True, text=True, check=True
+        )
+        samples.append(json.loads(out.stdout.strip().splitlines()[-1]))
+    return {
+        "module": module,
+        "median_ms": statistics.median(s["seconds"] for s in samples) * 1000,
+        "max_rss_mb": max(s["max_rss_kb"] for s in samples) / 1024,
+        "pymongo_loaded": samples[0]["pymongo_loaded"],
+    }
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    print(f"{'module':<20}{'median ms':>12}{'rss MB':>10}  pymongo")
+    for module in MODULES:
+        r = measure(module, runs)
+        print(f"{r['module']:<20}{r['median_ms']:>12.1f}{r['max_rss_mb']:>10.1f}  {r['pymongo_loaded']}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,147 @@
+"""
+End-to-end load test of /api/predict against the fake upstream.
+
+The Flask app is served by a threaded werkzeug server in a child
+process (so it does not share a GIL with the load generator). Client threads
+POST random (platform, time) combos for a fixed number of requests, and
+throughput and p50/p95/p99 latency are reported. The database is pointed
+at mongomock when installed, so process_prediction_request can be timed
+without a real MongoDB.
+
+    cd MyWingoWeb && python -m benchmarks.bench_predict --latency 0.05 --error-rate 0.01
+"""
+import os
+import time
+import socket
+import logging
+import random
+import argparse
+import threading
+import multiprocessing
+import statistics
+
+os.environ.setdefault("POLLER_ENABLED", "0")
+os.environ.setdefault("RATE_LIMIT_RATE", "0")  # one load-generating client
+
+import requests
+from werkzeug.serving import make_server, WSGIRequestHandler
+
+from benchmarks.fake_upstream import start_fake_upstream, point_api_helper_at
+
+COMBOS = [("Tiranga", "30s"), ("Tiranga", "1m"), ("Rajagames", "30s"), ("TrustWin", "30s"), ("TrustWin", "1m")]
+
+class _NoDelayHandler(WSGIRequestHandler):
+    # Without TCP_NODELAY the split header/body writes stall on delayed
+    # ACKs (~40 ms), which would swamp what we are measuring.
+    def setup(self):
+        super().setup()
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+def percentile(samples, pct):
+    if not samples: return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+def summarize(latencies, errors, elapsed):
+    return {
+        "requests": len(latencies) + errors,
+        "errors": errors,
+        "throughput_rps": (len(latencies) + errors) / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "mean_ms": statistics.fmean(latencies) * 1000 if latencies else 0.0,
+    }
+
+def _serve(base_url, port_queue, stop_event):
+    # Runs in its own process so the server and the load generator do
+    # not share a GIL.
+    point_api_helper_at(base_url)
+    import app as web
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)
+    server = make_server("127.0.0.1", 0, web.app, threaded=True, request_handler=_NoDelayHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    port_queue.put(server.server_port)
+    stop_event.wait()
+    server.shutdown()
+
+def run_load(latency=0.0, error_rate=0.0, concurrency=16, total=2000):
+    upstream, base_url = start_fake_upstream(latency, error_rate)
+    port_queue, stop_event = multiprocessing.Queue(), multiprocessing.Event()
+    server = multiprocessing.Process(target=_serve, args=(base_url, port_queue, stop_event), daemon=True)
+    server.start()
+    url = f"http://127.0.0.1:{port_queue.get(timeout=30)}/api/predict"
+
+    latencies, errors = [], [0]
+    lock = threading.Lock()
+    remaining = [total]
+
+    def client():
+        session = requests.Session()
+        rng = random.Random()
+        while True:
+            with lock:
+                if remaining[0] <= 0: return
+                remaining[0] -= 1
+            platform, game_time = rng.choice(COMBOS)
+            t = time.perf_counter()
+            try:
+                ok = session.post(url, json={"platform": platform, "time": game_time}, timeout=30).status_code == 200
+            except requests.RequestException:
+                ok = False
+            dt = time.perf_counter() - t
+            with lock:
+                if ok: latencies.append(dt)
+                else: errors[0] += 1
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    for t in threads: t.start()
+    for t in threads: t.join()
+    elapsed = time.perf_counter() - started
+
+    stop_event.set()
+    server.join(timeout=10)
+    upstream.shutdown()
+    return summarize(latencies, errors[0], elapsed)
+
+def run_user_path(total=2000):
+    """process_prediction_request against mongomock (skipped if not installed)."""
+    try:
+        import mongomock
+    except ImportError:
+        return None
+    import database
+    import prediction_engine as pe
+    from history import DrawHistory
+    database.set_database(mongomock.MongoClient().prediction_bot_db)
+    history = DrawHistory.from_rows([{'p': str(1000 + i), 'r': i % 10} for i in range(10)])
+    latencies = []
+    started = time.perf_counter()
+    for i in range(total):
+        t = time.perf_counter()
+        pe.process_prediction_request(i % 200, "win", history)
+        latencies.append(time.perf_counter() - t)
+    elapsed = time.perf_counter() - started
+    database.flush_user_updates()
+    return summarize(latencies, 0, elapsed)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--latency", type=float, default=0.0, help="fake upstream latency (s)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of upstream 503s")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+    for name, result in (
+        ("/api/predict", run_load(args.latency, args.error_rate, args.concurrency, args.requests)),
+        ("process_prediction_request", run_user_path(args.requests)),
+    ):
+        if result is None:
+            print(f"{name}: skipped (mongomock not installed)")
+            continue
+        print(f"{name}: {result['throughput_rps']:.0f} req/s  p50 {result['p50_ms']:.2f} ms  "
+              f"p95 {result['p95_ms']:.2f} ms  p99 {result['p99_ms']:.2f} ms  errors {result['errors']}")
+
+if __name__ == '__main__':
+    main()
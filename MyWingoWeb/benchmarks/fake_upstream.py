@@ -0,0 +1,83 @@
+"""
+Local stand-in for the draw APIs.
+
+Serves WinGo-shaped (`WinGo_30S.json`, `GetHistoryIssuePage.json`) and
+TrustWin-shaped (`GetGameIssue`, `GetNoaverageEmerdList`) payloads whose
+periods advance with the wall clock, with configurable latency, error
+rate, draw interval and phase (seconds the draws lag the epoch grid).
+"""
+import json
+import time
+import random
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+import api_helper
+
+INTERVALS = {"30S": 30, "1M": 60, "4": 30, "1": 60}
+
+def _period(interval, offset=0, phase=0.0):
+    slot = int((time.time() - phase) // interval) + offset
+    return str(20250000000000000 + slot)
+
+def _history(interval, size=10, phase=0.0):
+    rows = []
+    for i in range(1, size + 1):
+        period = _period(interval, -i, phase)
+        rows.append({"issueNumber": period, "number": str(int(period) * 7 % 10), "colour": "red"})
+    return {"data": {"list": rows}, "code": 0}
+
+class FakeUpstreamHandler(BaseHTTPRequestHandler):
+    latency = 0.0
+    error_rate = 0.0
+    interval = None  # overrides INTERVALS for every game
+    phase = 0.0
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.latency: time.sleep(self.latency)
+        if self.error_rate and random.random() < self.error_rate:
+            return self._send(503, {"code": 503})
+
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        if url.path.startswith("/WinGo/"):
+            interval = self.interval or INTERVALS["30S" if "30S" in url.path else "1M"]
+            if url.path.endswith("GetHistoryIssuePage.json"):
+                return self._send(200, _history(interval, phase=self.phase))
+            return self._send(200, {"current": {}, "data": {"issueNumber": _period(interval, phase=self.phase)}})
+        if url.path.startswith("/api/webapi/"):
+            interval = self.interval or INTERVALS.get(query.get("typeId", ["1"])[0], 60)
+            if url.path.endswith("GetNoaverageEmerdList"):
+                return self._send(200, _history(interval, phase=self.phase))
+            return self._send(200, {"data": {"issueNumber": _period(interval, phase=self.phase)}, "code": 0})
+        self._send(404, {"code": 404})
+
+def start_fake_upstream(latency=0.0, error_rate=0.0, interval=None, phase=0.0):
+    """Starts the server on a free port; returns (server, base_url)."""
+    handler = type("Handler", (FakeUpstreamHandler,), {"latency": latency, "error_rate": error_rate,
+                                                        "interval": interval, "phase": phase})
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+def point_api_helper_at(base_url):
+    """Rewrites api_helper's upstream URLs to the fake server."""
+    for table in (api_helper.COMMON_URLS, api_helper.TRUSTWIN_URLS):
+        for urls in table.values():
+            for name, url in urls.items():
+                parsed = urlparse(url)
+                rest = parsed.path + (f"?{parsed.query}" if parsed.query else "")
+                urls[name] = base_url + rest
@@ -0,0 +1,85 @@
+"""
+Regression check: the poller's lag behind draws whose phase is offset
+from the epoch grid.
+
+Runs the real DrawPoller against the fake upstream with draws every
+--interval seconds, shifted by each --offsets value, and records when
+each new period is stored. The poller's delay and retry spacing are
+scaled by interval/30, so a 3 s interval replays 30 s draws ten times
+faster. Once the DrawClock has settled (--warmup draws), every draw
+must be picked up within --max-lag seconds, also for offsets longer
+than the poller's retry burst.
+
+    cd MyWingoWeb && python -m benchmarks.poller_phase --interval 3 --offsets 0.1 1.0 2.0
+
+Exits 1 if any offset lags more than --max-lag after warm-up.
+"""
+import os
+import sys
+import time
+import argparse
+
+os.environ.setdefault("POLLER_ENABLED", "0")
+os.environ.setdefault("DRAW_STORE_ENABLED", "0")
+
+import api_helper
+from poller import DrawPoller
+from config import POLLER_DELAY, POLLER_RETRY_SPACING, POLLER_MAX_SPACING
+from benchmarks.fake_upstream import start_fake_upstream, point_api_helper_at
+
+BASE_PERIOD = 20250000000000000
+
+def measure(interval, offset, draws):
+    """Seconds between each draw going live upstream and the poller storing it."""
+    api_helper.GAME_INTERVALS["30s"] = interval
+    with api_helper._cache_lock:
+        api_helper._clocks.clear()
+        api_helper._cache.clear()
+        api_helper._trends.clear()
+
+    seen = []
+    def on_period(game_type, platform, period, history):
+        seen.append((int(period), time.time()))
+    api_helper._listeners[:] = [on_period]
+
+    upstream, base_url = start_fake_upstream(interval=interval, phase=offset)
+    point_api_helper_at(base_url)
+    scale = interval / 30
+    poller = DrawPoller(targets=[("Tiranga", "30s")], delay=POLLER_DELAY * scale,
+                        retry_spacing=POLLER_RETRY_SPACING * scale, max_spacing=POLLER_MAX_SPACING * scale)
+    try:
+        poller.start()
+        time.sleep(interval * draws)
+    finally:
+        poller.stop()
+        upstream.shutdown()
+
+    # Drop the first sighting: it is the period that was live at start-up
+    return [at - ((period - BASE_PERIOD) * interval + offset) for period, at in seen[1:]]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--interval", type=float, default=3.0, help="draw interval (s)")
+    parser.add_argument("--offsets", type=float, nargs="+", default=[0.1, 1.0, 2.0],
+                        help="draw phase behind the epoch grid (s)")
+    parser.add_argument("--draws", type=int, default=10, help="draws observed per offset")
+    parser.add_argument("--warmup", type=int, default=3, help="draws ignored while the clock learns")
+    parser.add_argument("--max-lag", type=float, default=0.3, help="allowed lag after warm-up (s)")
+    args = parser.parse_args()
+
+    failed = False
+    for offset in args.offsets:
+        lags = measure(args.interval, offset, args.draws)
+        settled = lags[args.warmup:]
+        worst = max(settled) if settled else float("inf")
+        print(f"offset {offset:>5.2f} s  lags {' '.join(f'{l:.2f}' for l in lags)}  "
+              f"worst settled {worst:.2f} s")
+        if worst > args.max_lag:
+            failed = True
+    if failed:
+        print(f"FAIL: a draw was picked up more than {args.max_lag} s late")
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
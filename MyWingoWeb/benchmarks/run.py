@@ -0,0 +1,69 @@
+"""
+Runs the benchmark suite and compares it with saved baselines.
+
+    cd MyWingoWeb
+    python -m benchmarks.run --save      # record benchmarks/baselines.json
+    python -m benchmarks.run --check     # exit 1 on a regression past --tolerance
+
+Timings (us/op, ms) regress when they grow; throughput when it drops.
+Baselines are machine-specific: record them on the machine that checks.
+"""
+import os
+import sys
+import json
+import argparse
+
+from benchmarks import bench_engines, bench_predict
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines.json")
+
+def collect(args):
+    results = {f"engine.{name}": us for name, us in bench_engines.run(args.number).items()}
+    load = bench_predict.run_load(args.latency, args.error_rate, args.concurrency, args.requests)
+    for key in ("throughput_rps", "p50_ms", "p95_ms", "p99_ms"):
+        results[f"predict.{key}"] = load[key]
+    user = bench_predict.run_user_path(args.requests)
+    if user:
+        for key in ("throughput_rps", "p50_ms", "p99_ms"):
+            results[f"user_path.{key}"] = user[key]
+    return results
+
+def compare(results, baseline, tolerance):
+    regressions = []
+    for name, value in results.items():
+        base = baseline.get(name)
+        if not base: continue
+        higher_is_better = name.endswith("throughput_rps")
+        change = (base - value) / base if higher_is_better else (value - base) / base
+        flag = "REGRESSION" if change > tolerance else ""
+        if flag: regressions.append(name)
+        print(f"{name:<46}{base:>12.2f}{value:>12.2f}{change * 100:>+9.1f}%  {flag}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="WinGo benchmark suite")
+    parser.add_argument("--save", action="store_true", help="write results as the new baseline")
+    parser.add_argument("--check", action="store_true", help="fail on regressions against the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--number", type=int, default=20000, help="iterations per microbenchmark")
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    results = collect(args)
+    if args.save:
+        with open(BASELINE_PATH, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        print(f"Saved {len(results)} baselines to {BASELINE_PATH}")
+    if os.path.exists(BASELINE_PATH) and not args.save:
+        with open(BASELINE_PATH) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        if args.check and regressions:
+            sys.exit(1)
+    elif not args.save:
+        print(json.dumps(results, indent=2, sort_keys=True))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,125 @@
+"""
+Concurrency stress test for redeem_gift_code against mongomock.
+
+N threads redeem one code at the same time; exactly one must succeed.
+Every collection call sleeps --rtt seconds to stand in for a network
+round trip, which also widens the race window of the old
+find-then-update path, reproduced here for comparison. Sequential
+redemptions of fresh codes then give the per-call latency of both.
+
+    cd MyWingoWeb && python -m benchmarks.stress_redeem --threads 50 --rtt 0.002
+
+Exits 1 if the current path ever lets more than one redeemer through.
+"""
+import os
+import sys
+import time
+import argparse
+import threading
+
+os.environ.setdefault("POLLER_ENABLED", "0")
+
+from benchmarks.bench_predict import summarize
+
+class _SlowCollection:
+    """Proxies a mongomock collection, sleeping `rtt` before each call."""
+
+    def __init__(self, collection, rtt):
+        self._collection = collection
+        self._rtt = rtt
+
+    def __getattr__(self, name):
+        attr = getattr(self._collection, name)
+        if not callable(attr): return attr
+        def call(*args, **kwargs):
+            time.sleep(self._rtt)
+            return attr(*args, **kwargs)
+        return call
+
+class _SlowDatabase:
+    def __init__(self, db, rtt):
+        self._db = db
+        self._rtt = rtt
+
+    def __getitem__(self, name):
+        return _SlowCollection(self._db[name], self._rtt)
+
+def legacy_redeem(code, user_id):
+    """redeem_gift_code before the atomic claim: four round trips, racy."""
+    import database
+    codes, users = database.get_collection("codes"), database.get_collection("users")
+    c = codes.find_one({"code": code, "is_redeemed": False})
+    if not c: return False, "Invalid or Redeemed Code"
+    expiry = time.time() + c['duration']
+    users.update_one({"user_id": user_id}, {"$set": {"prediction_status": "ACTIVE"}})
+    users.update_one({"user_id": user_id}, {"$set": {"expiry_timestamp": int(expiry)}})
+    codes.update_one({"_id": c["_id"]}, {"$set": {"is_redeemed": True, "redeemed_by": user_id}})
+    return True, c['plan_type']
+
+def _new_code(db, code):
+    db["codes"].insert_one({"code": code, "plan_type": "1_day", "duration": 86400, "is_redeemed": False})
+
+def race(redeem, db, code, threads):
+    """Successful redemptions when `threads` users redeem `code` at once."""
+    _new_code(db, code)
+    barrier = threading.Barrier(threads)
+    wins = []
+    def worker(user_id):
+        barrier.wait()
+        ok, _ = redeem(code, user_id)
+        if ok: wins.append(user_id)
+    pool = [threading.Thread(target=worker, args=(1000 + i,)) for i in range(threads)]
+    for t in pool: t.start()
+    for t in pool: t.join()
+    return len(wins)
+
+def latency(redeem, db, prefix, total):
+    latencies = []
+    started = time.perf_counter()
+    for i in range(total):
+        code = f"{prefix}-{i}"
+        _new_code(db, code)
+        t = time.perf_counter()
+        redeem(code, 1)
+        latencies.append(time.perf_counter() - t)
+    return summarize(latencies, 0, time.perf_counter() - started)
+
+def run(threads=50, rounds=5, rtt=0.002, total=200):
+    import mongomock
+    import database
+    raw = mongomock.MongoClient().prediction_bot_db
+    db = _SlowDatabase(raw, rtt)
+    database.set_database(db)
+    database.ensure_indexes()
+    for i in range(threads):
+        raw["users"].insert_one({"user_id": 1000 + i, "prediction_status": "NONE"})
+
+    results = {}
+    for name, redeem in (("atomic", database.redeem_gift_code), ("legacy", legacy_redeem)):
+        wins = [race(redeem, raw, f"{name}-race-{r}", threads) for r in range(rounds)]
+        results[name] = {"wins": wins, **latency(redeem, raw, f"{name}-seq", total)}
+    database.flush_user_updates()
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--threads", type=int, default=50, help="concurrent redeemers per code")
+    parser.add_argument("--rounds", type=int, default=5, help="codes raced")
+    parser.add_argument("--rtt", type=float, default=0.002, help="simulated round trip per call (s)")
+    parser.add_argument("--requests", type=int, default=200, help="sequential redemptions timed")
+    args = parser.parse_args()
+    try:
+        results = run(args.threads, args.rounds, args.rtt, args.requests)
+    except ImportError:
+        print("skipped (mongomock not installed)")
+        return 0
+    for name, r in results.items():
+        print(f"{name:<7} successes per code {r['wins']}  p50 {r['p50_ms']:.2f} ms  "
+              f"p99 {r['p99_ms']:.2f} ms  mean {r['mean_ms']:.2f} ms")
+    if any(w != 1 for w in results["atomic"]["wins"]):
+        print("FAIL: a code was redeemed other than exactly once")
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,100 @@
+import time
+import asyncio
+import logging
+from config import BROADCAST_RATE, BROADCAST_CONCURRENCY, BROADCAST_BATCH
+from database import get_user_id_batch, get_broadcast_checkpoint, save_broadcast_checkpoint
+
+logger = logging.getLogger(__name__)
+
+class TokenBucket:
+    """Async token bucket: `rate` tokens per second, bursts up to `capacity`."""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+class BroadcastStats:
+    def __init__(self, sent=0, failed=0):
+        self.sent = sent
+        self.failed = failed
+        self.started_at = time.monotonic()
+        self._start_total = sent + failed
+
+    @property
+    def rate(self):
+        """Messages per second in this run."""
+        elapsed = time.monotonic() - self.started_at
+        done = self.sent + self.failed - self._start_total
+        return done / elapsed if elapsed > 0 else 0.0
+
+    def __repr__(self):
+        return f"sent={self.sent} failed={self.failed} rate={self.rate:.1f}/s"
+
+async def run_broadcast(broadcast_id, send, rate=BROADCAST_RATE, concurrency=BROADCAST_CONCURRENCY,
+                        batch_size=BROADCAST_BATCH, on_progress=None):
+    """
+    Sends to every user via `await send(user_id)`, streaming user IDs in
+    _id-ordered pages through `concurrency` workers paced by a token
+    bucket. Progress is checkpointed per page under `broadcast_id`, so
+    calling again after a crash resumes after the last finished page.
+
+    Run it as a task so the bot keeps serving:
+        asyncio.create_task(run_broadcast(msg_id, lambda uid: bot.send_message(uid, text)))
+    """
+    checkpoint = await asyncio.to_thread(get_broadcast_checkpoint, broadcast_id) or {}
+    if checkpoint.get("done"):
+        return BroadcastStats(checkpoint.get("sent", 0), checkpoint.get("failed", 0))
+
+    stats = BroadcastStats(checkpoint.get("sent", 0), checkpoint.get("failed", 0))
+    last_id = checkpoint.get("last_id")
+    bucket = TokenBucket(rate)
+    queue = asyncio.Queue(maxsize=concurrency * 2)
+
+    async def worker():
+        while True:
+            user_id = await queue.get()
+            try:
+                await bucket.acquire()
+                await send(user_id)
+                stats.sent += 1
+            except Exception as e:
+                stats.failed += 1
+                logger.debug(f"Broadcast {broadcast_id} to {user_id} failed: {e}")
+            finally:
+                queue.task_done()
+
+    workers = [asyncio.create_task(worker()) for _ in range(concurrency)]
+    try:
+        while True:
+            batch = await asyncio.to_thread(get_user_id_batch, last_id, batch_size)
+            if not batch: break
+            for doc in batch:
+                if doc.get("user_id") is not None:
+                    await queue.put(doc["user_id"])
+            await queue.join()
+            last_id = batch[-1]["_id"]
+            await asyncio.to_thread(save_broadcast_checkpoint, broadcast_id, last_id, stats.sent, stats.failed)
+            logger.info(f"Broadcast {broadcast_id}: {stats}")
+            if on_progress: on_progress(stats)
+        await asyncio.to_thread(save_broadcast_checkpoint, broadcast_id, last_id, stats.sent, stats.failed, True)
+    finally:
+        for w in workers:
+            w.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+
+    logger.info(f"Broadcast {broadcast_id} finished: {stats}")
+    return stats
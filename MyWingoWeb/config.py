@@ -1,13 +1,78 @@
 import os
+import logging
 from dotenv import load_dotenv
 
 load_dotenv()
 
+def configure_logging():
+    """Default log format; a no-op if the process already configured logging."""
+    logging.basicConfig(format="%(asctime)s - %(name)s - %(levelname)s - %(message)s", level=logging.INFO)
+
 # --- Configuration ---
 BOT_TOKEN = os.getenv("BOT_TOKEN", "YOUR_BOT_TOKEN_HERE")
 MONGO_URI = os.getenv("MONGO_URI", "YOUR_MONGO_URI_HERE")
 ADMIN_ID = int(os.getenv("ADMIN_ID", "123456789")) 
 
+# --- Web Background Services ---
+POLLER_ENABLED = os.getenv("POLLER_ENABLED", "1") == "1"
+POLLER_DELAY = float(os.getenv("POLLER_DELAY", "0.3"))  # seconds after each learned draw boundary
+POLLER_RETRIES = int(os.getenv("POLLER_RETRIES", "5"))  # re-polls at POLLER_RETRY_SPACING before backing off
+POLLER_RETRY_SPACING = float(os.getenv("POLLER_RETRY_SPACING", "0.5"))  # seconds, +/-50% jitter
+POLLER_MAX_SPACING = float(os.getenv("POLLER_MAX_SPACING", "4"))  # backoff cap while the new period is late
+
+# --- /api/predict Admission ---
+RATE_LIMIT_RATE = float(os.getenv("RATE_LIMIT_RATE", "1"))  # requests per second per client (0 = off)
+RATE_LIMIT_BURST = float(os.getenv("RATE_LIMIT_BURST", "10"))
+RATE_LIMIT_CLIENTS = int(os.getenv("RATE_LIMIT_CLIENTS", "50000"))  # tracked clients before idle ones are pruned
+TRUST_PROXY = os.getenv("TRUST_PROXY", "0") == "1"  # take the client from X-Forwarded-For
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "8"))  # (platform, time) pairs per /api/predict/batch
+
+# --- Local Draw Store ---
+DRAW_STORE_ENABLED = os.getenv("DRAW_STORE_ENABLED", "1") == "1"
+DRAW_STORE_DIR = os.getenv("DRAW_STORE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data"))
+
+# --- MongoDB Client ---
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", "50"))
+MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", "0"))
+MONGO_CONNECT_TIMEOUT_MS = int(os.getenv("MONGO_CONNECT_TIMEOUT_MS", "5000"))
+MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", "5000"))
+MONGO_SOCKET_TIMEOUT_MS = int(os.getenv("MONGO_SOCKET_TIMEOUT_MS", "10000"))
+
+# --- MongoDB Write-Behind ---
+WRITE_BEHIND_ENABLED = os.getenv("WRITE_BEHIND_ENABLED", "1") == "1"
+WRITE_BEHIND_INTERVAL = float(os.getenv("WRITE_BEHIND_INTERVAL", "0.5"))  # seconds between flushes
+WRITE_BEHIND_BATCH = int(os.getenv("WRITE_BEHIND_BATCH", "500"))  # users pending before an early flush
+
+# --- In-Process Caches ---
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "10000"))
+USER_CACHE_TTL = float(os.getenv("USER_CACHE_TTL", "60"))  # seconds
+SETTINGS_CACHE_TTL = float(os.getenv("SETTINGS_CACHE_TTL", "5"))  # seconds
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "256"))  # serialized /api/predict bodies
+
+# --- Broadcasts ---
+BROADCAST_RATE = float(os.getenv("BROADCAST_RATE", "25"))  # messages per second (Telegram allows ~30)
+BROADCAST_CONCURRENCY = int(os.getenv("BROADCAST_CONCURRENCY", "10"))
+BROADCAST_BATCH = int(os.getenv("BROADCAST_BATCH", "500"))  # user IDs per page / checkpoint
+
+# --- Shared State (multi-worker) ---
+STATE_BACKEND = os.getenv("STATE_BACKEND", "local")  # "local" or redis://host:6379/0
+SHARED_WAIT = float(os.getenv("SHARED_WAIT", "3"))  # seconds a follower waits for the leader's fetch
+
+# --- Upstream HTTP ---
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "10"))
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "2"))
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "3"))
+HTTP_RETRIES = int(os.getenv("HTTP_RETRIES", "1"))  # extra attempts after connect errors / 5xx, not read timeouts
+HTTP_BACKOFF = float(os.getenv("HTTP_BACKOFF", "0.2"))  # seconds, doubled per retry + jitter
+BREAKER_THRESHOLD = int(os.getenv("BREAKER_THRESHOLD", "3"))  # consecutive failures
+BREAKER_COOLDOWN = float(os.getenv("BREAKER_COOLDOWN", "30"))  # seconds before a trial request
+
+# --- Metrics (multi-worker) ---
+# With several workers each one snapshots its series here and /metrics sums
+# them all; gunicorn.conf.py points it at a fresh directory per master.
+METRICS_DIR = os.getenv("METRICS_DIR", "")
+METRICS_SNAPSHOT_INTERVAL = float(os.getenv("METRICS_SNAPSHOT_INTERVAL", "2"))  # seconds
+
 # --- Constants ---
 REGISTER_LINK = "https://t.me/+pR0EE-BzatNjZjNl" 
 PAYMENT_IMAGE_URL = "https://cdn.discordapp.com/attachments/888361275464220733/1451949298928455831/Screenshot_20251029-1135273.png"
@@ -62,6 +127,10 @@ MAX_HISTORY_LENGTH = 12
 PATTERN_LENGTH = 4
 PATTERN_PROBABILITY = 0.8
 
+# --- V5 Hash Table ---
+HASH_PRECOMPUTE_AHEAD = 32   # periods hashed per miss
+HASH_TABLE_SIZE = 4096       # (period, salt) entries kept, LRU
+
 # --- SALTS ---
 V5_SALT = "ar-lottery-v5-plus"
 TRUSTWIN_SALT = "gods_plan"
@@ -1,41 +1,405 @@
 import time
+import atexit
 import random
 import logging
+import threading
 from datetime import datetime
-from pymongo import MongoClient
-from config import MONGO_URI
+from collections import OrderedDict
+from functools import wraps
+from contextlib import contextmanager
+from pymongo import MongoClient, UpdateOne, ASCENDING, DESCENDING
+from config import (MONGO_URI, WRITE_BEHIND_ENABLED, WRITE_BEHIND_INTERVAL, WRITE_BEHIND_BATCH,
+                    USER_CACHE_SIZE, USER_CACHE_TTL, SETTINGS_CACHE_TTL, configure_logging,
+                    MONGO_MAX_POOL_SIZE, MONGO_MIN_POOL_SIZE, MONGO_CONNECT_TIMEOUT_MS,
+                    MONGO_SERVER_SELECTION_TIMEOUT_MS, MONGO_SOCKET_TIMEOUT_MS)
+from metrics import REGISTRY
 
-logging.basicConfig(format="%(asctime)s - %(name)s - %(levelname)s - %(message)s", level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-users_collection = None 
-settings_collection = None
-codes_collection = None
+# --- METRICS ---
+DB_CALLS = REGISTRY.counter("wingo_db_calls_total", "database.py helper calls (outermost only).", ("helper",))
+DB_LATENCY = REGISTRY.histogram("wingo_db_seconds", "database.py helper latency.", ("helper",))
+DB_OPS = REGISTRY.counter(
+    "wingo_db_ops_total", "MongoDB round trips by calling helper and collection method.", ("helper", "op"))
+DB_OPS_PER_CALL = REGISTRY.histogram(
+    "wingo_db_ops_per_call", "MongoDB round trips per helper call (0 = served from cache).", ("helper",),
+    buckets=(0, 1, 2, 3, 4, 6, 10))
+USER_CACHE = REGISTRY.counter("wingo_user_cache_total", "User profile cache lookups.", ("result",))
+WRITE_BEHIND_FLUSHED = REGISTRY.counter(
+    "wingo_write_behind_users_total", "Users written by write-behind flushes.", ("result",))
 
-try:
-    client = MongoClient(MONGO_URI)
-    db = client.prediction_bot_db
-    users_collection = db.users
-    settings_collection = db.settings
-    codes_collection = db.codes
-    logger.info("✅ Successfully connected to MongoDB.")
-except Exception as e:
-    logger.error(f"❌ Failed to connect to MongoDB: {e}")
+# The outermost helper on this thread and its round trips so far; helpers
+# called from another helper are folded into the outer one, not counted.
+_call = threading.local()
+
+def _instrumented(fn):
+    name = fn.__name__
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        if getattr(_call, "helper", None) is not None:
+            return fn(*args, **kwargs)
+        _call.helper, _call.ops = name, 0
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            DB_LATENCY.observe(time.perf_counter() - start, name)
+            DB_CALLS.inc(name)
+            DB_OPS_PER_CALL.observe(_call.ops, name)
+            _call.helper = None
+    return wrapper
+
+class _CountedCollection:
+    """
+    Collection proxy counting each method call as one round trip (a
+    cursor's later getMore batches are not counted).
+    """
+
+    __slots__ = ("_collection",)
+
+    def __init__(self, collection):
+        self._collection = collection
+
+    def __getattr__(self, name):
+        attr = getattr(self._collection, name)
+        if not callable(attr): return attr
+        def call(*args, **kwargs):
+            helper = getattr(_call, "helper", None)
+            DB_OPS.inc(helper or "other", name)
+            if helper is not None: _call.ops += 1
+            return attr(*args, **kwargs)
+        return call
+
+# --- LAZY CONNECTION ---
+# Importing this module does no I/O. The client is created on first use,
+# so processes that never touch users (e.g. the web app) never pay for it.
+
+_db = None
+_db_ready = False
+_db_lock = threading.Lock()
+
+def get_db():
+    """The prediction_bot_db database, connecting on first call (None on failure)."""
+    global _db, _db_ready
+    if _db_ready: return _db
+    with _db_lock:
+        if _db_ready: return _db
+        configure_logging()
+        try:
+            client = MongoClient(
+                MONGO_URI,
+                maxPoolSize=MONGO_MAX_POOL_SIZE,
+                minPoolSize=MONGO_MIN_POOL_SIZE,
+                connectTimeoutMS=MONGO_CONNECT_TIMEOUT_MS,
+                serverSelectionTimeoutMS=MONGO_SERVER_SELECTION_TIMEOUT_MS,
+                socketTimeoutMS=MONGO_SOCKET_TIMEOUT_MS,
+            )
+            _db = client.prediction_bot_db
+            logger.info("✅ Successfully connected to MongoDB.")
+            # Startup step; runs off the caller's path so a slow server cannot block it.
+            threading.Thread(target=ensure_indexes, name="mongo-indexes", daemon=True).start()
+        except Exception as e:
+            logger.error(f"❌ Failed to connect to MongoDB: {e}")
+            _db = None
+        _db_ready = True
+    return _db
+
+def set_database(db):
+    """Points every helper at `db` (e.g. a mongomock database) without connecting."""
+    global _db, _db_ready
+    with _db_lock:
+        _db = db
+        _db_ready = True
+
+def get_collection(name):
+    db = get_db()
+    return _CountedCollection(db[name]) if db is not None else None
+
+def _users(): return get_collection("users")
+def _settings(): return get_collection("settings")
+def _codes(): return get_collection("codes")
+def _broadcasts(): return get_collection("broadcasts")
+
+_LEGACY_COLLECTIONS = {
+    "users_collection": _users,
+    "settings_collection": _settings,
+    "codes_collection": _codes,
+    "broadcasts_collection": _broadcasts,
+}
+
+def __getattr__(name):
+    # Keeps `database.users_collection` & co. working for existing callers.
+    if name in _LEGACY_COLLECTIONS:
+        return _LEGACY_COLLECTIONS[name]()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+# --- INDEXES ---
+# One entry per query shape used below: (collection, name, keys, options).
+INDEXES = [
+    ("users", "user_id_unique", [("user_id", ASCENDING)], {"unique": True}),
+    ("users", "active_subs", [("prediction_status", ASCENDING), ("expiry_timestamp", ASCENDING)], {}),
+    ("users", "top_referrers",
+     [("referral_purchases", DESCENDING), ("user_id", ASCENDING), ("username", ASCENDING)], {}),
+    ("codes", "code_unique", [("code", ASCENDING)], {"unique": True}),
+]
+
+# Indexes created by earlier versions that no query needs any more; each
+# one only adds write cost. code_redeemed duplicated code_unique's prefix.
+RETIRED_INDEXES = [("codes", "code_redeemed")]
+
+def ensure_indexes():
+    """Creates missing indexes and returns the names that could not be verified."""
+    if _users() is None: return [name for _, name, _, _ in INDEXES]
+    collections = {"users": _users(), "codes": _codes()}
+    missing = []
+    for coll_name, name, keys, options in INDEXES:
+        coll = collections[coll_name]
+        try:
+            coll.create_index(keys, name=name, background=True, **options)
+        except Exception as e:
+            # e.g. duplicate user_id documents block a unique index
+            logger.error(f"Index {coll_name}.{name} could not be created: {e}")
+        try:
+            if name not in coll.index_information():
+                missing.append(name)
+        except Exception as e:
+            logger.error(f"Index {coll_name}.{name} could not be verified: {e}")
+            missing.append(name)
+    for coll_name, name in RETIRED_INDEXES:
+        try:
+            if name in collections[coll_name].index_information():
+                collections[coll_name].drop_index(name)
+        except Exception as e:
+            logger.error(f"Retired index {coll_name}.{name} could not be dropped: {e}")
+    if missing:
+        logger.warning(f"Missing MongoDB indexes: {missing}")
+    return missing
+
+# --- WRITE-BEHIND USER UPDATES ---
+# $set updates are merged per user and flushed with one bulk_write every
+# WRITE_BEHIND_INTERVAL seconds (or once WRITE_BEHIND_BATCH users are
+# pending). Until a batch is acknowledged, get_user_data overlays it so
+# this process always reads its own writes.
+
+_pending = {}
+_flushing = {}
+_write_lock = threading.Lock()
+_flush_lock = threading.Lock()
+_flush_wakeup = threading.Event()
+_flush_seq = 0
+_flusher = None
+
+def _flusher_loop():
+    while True:
+        _flush_wakeup.wait(WRITE_BEHIND_INTERVAL)
+        _flush_wakeup.clear()
+        if not _pending: continue  # idle ticks are not flushes: keep them out of the metrics
+        try:
+            flush_user_updates()
+        except Exception as e:
+            logger.error(f"Write-behind flush failed: {e}")
+
+def _queue_user_update(user_id, fields):
+    global _flusher
+    with _write_lock:
+        _pending.setdefault(user_id, {}).update(fields)
+        size = len(_pending)
+        if _flusher is None:
+            _flusher = threading.Thread(target=_flusher_loop, name="user-write-behind", daemon=True)
+            _flusher.start()
+    if size >= WRITE_BEHIND_BATCH:
+        _flush_wakeup.set()
+
+@_instrumented
+def flush_user_updates():
+    """Writes every pending user update in one bulk_write. Returns the user count."""
+    global _flushing, _flush_seq
+    if not _pending or _users() is None: return 0
+    with _flush_lock:
+        with _write_lock:
+            if not _pending: return 0
+            _flushing = dict(_pending)
+            _pending.clear()
+        batch = _flushing
+        try:
+            _users().bulk_write(
+                [UpdateOne({"user_id": uid}, {"$set": fields}) for uid, fields in batch.items()],
+                ordered=False
+            )
+        except Exception as e:
+            WRITE_BEHIND_FLUSHED.inc("failed", amount=len(batch))
+            logger.error(f"Write-behind bulk_write failed, requeueing {len(batch)} users: {e}")
+            with _write_lock:
+                for uid, fields in batch.items():
+                    merged = dict(fields)
+                    merged.update(_pending.get(uid, {}))
+                    _pending[uid] = merged
+            return 0
+        finally:
+            with _write_lock:
+                _flushing = {}
+                _flush_seq += 1
+    WRITE_BEHIND_FLUSHED.inc("ok", amount=len(batch))
+    return len(batch)
+
+atexit.register(flush_user_updates)
+
+def _apply_pending(user_id, user):
+    with _write_lock:
+        for fields in (_flushing.get(user_id), _pending.get(user_id)):
+            if fields: user.update(fields)
+
+# --- USER PROFILE CACHE ---
+# Read-through LRU of user documents. Writes made through this module
+# update the cached copy in place; USER_CACHE_TTL bounds staleness from
+# writes made by other processes.
+
+_user_cache = OrderedDict()
+_user_cache_lock = threading.Lock()
+
+def _get_cached_user(user_id):
+    with _user_cache_lock:
+        entry = _user_cache.get(user_id)
+        if entry is None: return None
+        if time.time() - entry[0] > USER_CACHE_TTL:
+            del _user_cache[user_id]
+            return None
+        _user_cache.move_to_end(user_id)
+        return entry[1]
+
+def _cache_user(user_id, user):
+    # caller holds _user_cache_lock
+    _user_cache[user_id] = (time.time(), user)
+    _user_cache.move_to_end(user_id)
+    while len(_user_cache) > USER_CACHE_SIZE:
+        _user_cache.popitem(last=False)
+
+# A write that lands while a miss is still reading the document finds no
+# entry to update, and the miss would then cache the older copy. While a
+# load or write for a user is in flight, _user_seq holds [loads, writes,
+# version]; a load caches its result only if no write overlapped it.
+_user_seq = {}
+
+def _release_seq(user_id, state):
+    # caller holds _user_cache_lock
+    if not state[0] and not state[1]: del _user_seq[user_id]
+
+@contextmanager
+def _user_write(user_id):
+    with _user_cache_lock:
+        state = _user_seq.setdefault(user_id, [0, 0, 0])
+        state[1] += 1
+        state[2] += 1
+    try:
+        yield
+    finally:
+        with _user_cache_lock:
+            state[1] -= 1
+            state[2] += 1
+            _release_seq(user_id, state)
+
+def _load_and_cache_user(user_id):
+    for _ in range(3):
+        with _user_cache_lock:
+            state = _user_seq.setdefault(user_id, [0, 0, 0])
+            state[0] += 1
+            version = state[2]
+        user = None
+        try:
+            user = _load_user(user_id)
+        finally:
+            with _user_cache_lock:
+                state[0] -= 1
+                clean = not state[1] and state[2] == version
+                _release_seq(user_id, state)
+                if clean and user is not None:
+                    # Writes queued since the read are overlaid at insert time.
+                    _apply_pending(user_id, user)
+                    _cache_user(user_id, user)
+        if clean: return user
+    return user  # served uncached; the next call reads again
+
+def _update_cached_user(user_id, fields=None, increments=None):
+    with _user_cache_lock:
+        entry = _user_cache.get(user_id)
+        if entry is None: return
+        user = entry[1]
+        if fields: user.update(fields)
+        for field, amount in (increments or {}).items():
+            user[field] = (user.get(field) or 0) + amount
+
+def invalidate_user(user_id):
+    with _user_cache_lock:
+        _user_cache.pop(user_id, None)
 
 # --- HELPER FUNCTIONS ---
 
+@_instrumented
+def update_user_fields(user_id, fields, sync=False):
+    """
+    Sets several fields with a single $set. Deferred when write-behind is
+    on, unless `sync`, which writes now and supersedes pending values.
+    """
+    if _users() is None or not fields: return
+    with _user_write(user_id):
+        _update_cached_user(user_id, fields=fields)
+        if WRITE_BEHIND_ENABLED and not sync:
+            _queue_user_update(user_id, fields)
+        elif WRITE_BEHIND_ENABLED:
+            # Hold off flushes so an older buffered value cannot land after this.
+            with _flush_lock:
+                with _write_lock:
+                    pending = _pending.get(user_id)
+                    if pending:
+                        for field in fields: pending.pop(field, None)
+                        if not pending: del _pending[user_id]
+                _users().update_one({"user_id": user_id}, {"$set": fields})
+        else:
+            _users().update_one({"user_id": user_id}, {"$set": fields})
+
+@_instrumented
 def update_user_field(user_id, field, value):
-    if users_collection is not None:
-        users_collection.update_one({"user_id": user_id}, {"$set": {field: value}})
+    update_user_fields(user_id, {field: value})
 
+@_instrumented
 def increment_user_field(user_id, field, amount=1):
-    if users_collection is not None:
-        users_collection.update_one({"user_id": user_id}, {"$inc": {field: amount}})
+    if _users() is None: return
+    with _user_write(user_id):
+        _update_cached_user(user_id, increments={field: amount})
+        with _write_lock:
+            for fields in (_pending.get(user_id), _flushing.get(user_id)):
+                if fields and field in fields:
+                    # A deferred $set would overwrite the $inc; fold it in instead.
+                    _pending.setdefault(user_id, {})[field] = (fields[field] or 0) + amount
+                    return
+        _users().update_one({"user_id": user_id}, {"$inc": {field: amount}})
 
+@_instrumented
 def get_user_data(user_id):
-    if users_collection is None: return {}
-    
-    user = users_collection.find_one({"user_id": user_id})
+    if _users() is None: return {}
+
+    user = _get_cached_user(user_id)
+    if user is None:
+        USER_CACHE.inc("miss")
+        user = _load_and_cache_user(user_id)
+    else:
+        USER_CACHE.inc("hit")
+
+    # Expiry boundary is checked against the cached document, not Mongo.
+    if user.get("prediction_status") == "ACTIVE" and user.get("expiry_timestamp", 0) < time.time():
+        update_user_field(user_id, "prediction_status", "NONE")
+
+    return dict(user)
+
+def _load_user(user_id):
+    # Re-read if a flush landed mid-read, so the overlay below is never
+    # dropped before its batch is visible in Mongo.
+    for _ in range(3):
+        seq = _flush_seq
+        user = _users().find_one({"user_id": user_id})
+        if seq == _flush_seq: break
+    if user is not None:
+        _apply_pending(user_id, user)
     if user is None:
         user = {
             "user_id": user_id,
@@ -59,7 +423,12 @@ def get_user_data(user_id):
             "total_wins": 0,
             "total_losses": 0
         }
-        users_collection.insert_one(user)
+        # Upsert, not insert: with user_id unique, a concurrent first call
+        # for the same user would raise DuplicateKeyError. Whoever lost the
+        # race reads the stored document.
+        _users().update_one({"user_id": user_id}, {"$setOnInsert": user}, upsert=True)
+        user = _users().find_one({"user_id": user_id}) or user
+        _apply_pending(user_id, user)
     
     # Backfill defaults
     defaults = {
@@ -68,31 +437,39 @@ def get_user_data(user_id):
     for key, val in defaults.items():
         if key not in user: user[key] = val
 
-    if user.get("prediction_status") == "ACTIVE" and user.get("expiry_timestamp", 0) < time.time():
-        update_user_field(user_id, "prediction_status", "NONE")
-        user["prediction_status"] = "NONE"
-        
     return user
 
 # --- GLOBAL SETTINGS ---
+_settings_cache = (0.0, None)
+
+@_instrumented
 def get_settings():
-    if settings_collection is None: return {"maintenance_mode": False}
-    s = settings_collection.find_one({"_id": "global_settings"})
+    global _settings_cache
+    if _settings() is None: return {"maintenance_mode": False}
+    cached_at, cached = _settings_cache
+    if cached is not None and time.time() - cached_at < SETTINGS_CACHE_TTL:
+        return dict(cached)
+    s = _settings().find_one({"_id": "global_settings"})
     if not s:
         s = {"_id": "global_settings", "maintenance_mode": False}
-        settings_collection.insert_one(s)
-    return s
+        _settings().insert_one(s)
+    _settings_cache = (time.time(), s)
+    return dict(s)
 
+@_instrumented
 def set_maintenance_mode(status: bool):
-    if settings_collection is not None:
-        settings_collection.update_one({"_id": "global_settings"}, {"$set": {"maintenance_mode": status}}, upsert=True)
+    global _settings_cache
+    if _settings() is not None:
+        _settings().update_one({"_id": "global_settings"}, {"$set": {"maintenance_mode": status}}, upsert=True)
+        _settings_cache = (0.0, None)
 
 # --- GIFT CODES ---
+@_instrumented
 def create_gift_code(plan_type, duration):
-    if codes_collection is None: return "ERROR-DB"
+    if _codes() is None: return "ERROR-DB"
     import uuid
     code = f"GIFT-{uuid.uuid4().hex[:8].upper()}"
-    codes_collection.insert_one({
+    _codes().insert_one({
         "code": code,
         "plan_type": plan_type,
         "duration": duration,
@@ -100,47 +477,85 @@ def create_gift_code(plan_type, duration):
     })
     return code
 
+@_instrumented
 def redeem_gift_code(code, user_id):
-    if codes_collection is None: return False, "DB Error"
+    if _codes() is None: return False, "DB Error"
     
-    c = codes_collection.find_one({"code": code, "is_redeemed": False})
+    # Claim-if-unredeemed in one round trip: of any concurrent redeemers,
+    # exactly one gets the document back.
+    c = _codes().find_one_and_update(
+        {"code": code, "is_redeemed": False},
+        {"$set": {"is_redeemed": True, "redeemed_by": user_id, "redeemed_at": int(time.time())}},
+        projection={"plan_type": 1, "duration": 1}
+    )
     if not c: return False, "Invalid or Redeemed Code"
     
     # Apply
     expiry = time.time() + c['duration']
-    update_user_field(user_id, "prediction_status", "ACTIVE")
-    update_user_field(user_id, "expiry_timestamp", int(expiry))
-    
-    codes_collection.update_one({"_id": c["_id"]}, {"$set": {"is_redeemed": True, "redeemed_by": user_id}})
+    update_user_fields(user_id, {"prediction_status": "ACTIVE", "expiry_timestamp": int(expiry)}, sync=True)
     return True, c['plan_type']
 
 # --- STATS FUNCTIONS (FIXED) ---
 
+@_instrumented
 def get_total_users():
     # FIXED: Check explicitly against None
-    if users_collection is not None:
-        return users_collection.count_documents({})
+    if _users() is not None:
+        return _users().count_documents({})
     return 0
 
+@_instrumented
 def get_active_subs_count():
     # FIXED: Check explicitly against None
-    if users_collection is not None:
-        return users_collection.count_documents({
+    if _users() is not None:
+        return _users().count_documents({
             "prediction_status": "ACTIVE",
             "expiry_timestamp": {"$gt": time.time()}
         })
     return 0
 
+@_instrumented
 def get_all_user_ids():
     # FIXED: Check explicitly against None
-    if users_collection is not None:
-        return users_collection.find({}, {"user_id": 1})
+    if _users() is not None:
+        # The sort on user_id lets the planner pick user_id_unique, so this is
+        # a covered index scan instead of a collection scan. No hint(): a
+        # missing or still-building index must not fail the query.
+        return _users().find({}, {"user_id": 1, "_id": 0}).sort("user_id", ASCENDING)
     return []
 
+@_instrumented
+def get_user_id_batch(after_id=None, limit=500):
+    """
+    One page of {_id, user_id} in _id order, starting after `after_id`.
+    Walking pages by _id keeps memory flat and gives a resume point.
+    """
+    if _users() is None: return []
+    query = {"_id": {"$gt": after_id}} if after_id is not None else {}
+    return list(_users().find(query, {"_id": 1, "user_id": 1}).sort("_id", 1).limit(limit))
+
+@_instrumented
+def get_broadcast_checkpoint(broadcast_id):
+    if _broadcasts() is None: return None
+    return _broadcasts().find_one({"_id": broadcast_id})
+
+@_instrumented
+def save_broadcast_checkpoint(broadcast_id, last_id, sent, failed, done=False):
+    if _broadcasts() is not None:
+        _broadcasts().update_one(
+            {"_id": broadcast_id},
+            {"$set": {"last_id": last_id, "sent": sent, "failed": failed, "done": done, "updated_at": int(time.time())}},
+            upsert=True
+        )
+
+@_instrumented
 def get_top_referrers(limit=10):
     # FIXED: Check explicitly against None
-    if users_collection is not None:
-        return list(users_collection.find().sort("referral_purchases", -1).limit(limit))
+    if _users() is not None:
+        # Covered by top_referrers (picked by the planner): no full documents are fetched.
+        return list(_users().find(
+            {}, {"_id": 0, "user_id": 1, "username": 1, "referral_purchases": 1}
+        ).sort([("referral_purchases", -1), ("user_id", 1)]).limit(limit))
     return []
 
 def is_subscription_active(user_data) -> bool:
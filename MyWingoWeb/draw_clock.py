@@ -0,0 +1,117 @@
+import math
+import time
+import threading
+
+STALE_RECHECK = 1.0  # seconds; how long an overdue period stays cached
+
+class DrawClock:
+    """
+    Learns when one (source, game_type) rolls over to the next period.
+
+    Every fetch reports the current issueNumber. A change from P to P+1
+    between two fetches bounds the boundary to (last time P was seen,
+    first time P+1 was seen]. Bounds from successive draws, projected by
+    the cadence, are intersected, so the phase tightens the more often
+    draws are observed close to the boundary. The cadence itself starts
+    at the nominal interval and is re-estimated once the observed draws
+    span enough periods. Until the first transition the clock assumes
+    epoch-aligned boundaries.
+    """
+
+    MIN_SPAN = 20      # periods between estimates before the cadence is re-fitted
+    MAX_DRIFT = 0.1    # fitted cadence must stay within 10% of nominal
+    MAX_JUMP = 1000    # larger period jumps (day rollover) restart learning
+
+    def __init__(self, interval):
+        self.nominal = float(interval)
+        self.cadence = float(interval)
+        self._lock = threading.Lock()
+        self._period = None       # last period seen and when
+        self._seen_at = None
+        self._bound_period = None  # period whose start lies in [_lo, _hi]
+        self._lo = self._hi = None
+        self._origin = None        # (period, boundary midpoint) for the cadence fit
+
+    def observe(self, period, now=None):
+        """Records that `period` was the current period at `now`."""
+        period = int(period)
+        now = time.time() if now is None else now
+        with self._lock:
+            if self._period is not None and 0 < self._period - period <= self.MAX_JUMP:
+                return  # a stale read; keep the newer observation
+            if self._period is None or abs(period - self._period) > self.MAX_JUMP:
+                # First sight or renumbering: the phase (_lo/_hi) still holds,
+                # period arithmetic and the cadence fit start over.
+                self._bound_period = self._origin = None
+                self._period, self._seen_at = period, now
+                return
+            if period == self._period:
+                # Shared-tier reads carry the leader's fetch time, which can
+                # be older than our own last sighting.
+                self._seen_at = max(self._seen_at, now)
+                return
+            if now <= self._seen_at:
+                # Out-of-order timestamps (clocks of other workers): no bound.
+                self._bound_period = self._origin = None
+                self._period, self._seen_at = period, now
+                return
+
+            steps = period - self._period
+            lo, hi = self._seen_at, now
+            if steps > 1:
+                # Missed draws: only the last cadence before `now` can hold the boundary
+                lo = max(lo, hi - self.cadence)
+            if self._bound_period is not None:
+                shift = (period - self._bound_period) * self.cadence
+                lo, hi = max(lo, self._lo + shift), min(hi, self._hi + shift)
+                if lo > hi:  # drifted: trust the fresh observation
+                    lo, hi = max(self._seen_at, now - self.cadence), now
+            self._bound_period, self._lo, self._hi = period, lo, hi
+            self._period, self._seen_at = period, now
+            self._fit_cadence(period, (lo + hi) / 2)
+
+    def _fit_cadence(self, period, mid):
+        if self._origin is None:
+            self._origin = (period, mid)
+            return
+        span = period - self._origin[0]
+        if span < self.MIN_SPAN: return
+        estimate = (mid - self._origin[1]) / span
+        if abs(estimate - self.nominal) <= self.nominal * self.MAX_DRIFT:
+            self.cadence = estimate
+
+    @property
+    def uncertainty(self):
+        """Width of the learned boundary window in seconds (None before the first draw)."""
+        return None if self._hi is None else self._hi - self._lo
+
+    def next_draw_at(self, now=None):
+        """Next time a new period is out (boundary upper bound), strictly after `now`."""
+        now = time.time() if now is None else now
+        with self._lock:
+            if self._hi is None:
+                return (int(now) // int(self.nominal) + 1) * self.nominal
+            return self._hi + (math.floor((now - self._hi) / self.cadence) + 1) * self.cadence
+
+    def window(self, period):
+        """(earliest, latest) time `period` can go live upstream; None before the first draw."""
+        with self._lock:
+            if self._bound_period is None: return None
+            shift = (int(period) - self._bound_period) * self.cadence
+            return self._lo + shift, self._hi + shift
+
+    def expected_period(self, now=None):
+        """The period that must be current by `now`, if known."""
+        now = time.time() if now is None else now
+        with self._lock:
+            if self._bound_period is None or now < self._hi: return None
+            return self._bound_period + math.floor((now - self._hi) / self.cadence)
+
+    def expires_at(self, period, now=None):
+        """How long data showing `period` as current stays fresh."""
+        now = time.time() if now is None else now
+        expected = self.expected_period(now)
+        if expected is not None and int(period) < expected:
+            # The draw is out but upstream hasn't shown it yet: re-check soon
+            return now + STALE_RECHECK
+        return self.next_draw_at(now)
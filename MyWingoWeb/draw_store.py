@@ -0,0 +1,147 @@
+import os
+import mmap
+import struct
+import logging
+import threading
+from array import array
+from bisect import bisect_right
+
+from config import DRAW_STORE_DIR
+from history import DrawHistory
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-process dev server only
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# One record per draw: period (int64) + result digit (uint8), little-endian.
+RECORD = struct.Struct("<qB")
+
+class DrawStore:
+    """
+    Append-only draw history for one (source, game_type), oldest first.
+
+    Periods only ever grow, so the index is a short list of contiguous
+    runs (start period, start row): a period maps to its row with one
+    bisect over the runs and an add. Reads go through mmap, and other
+    processes' appends are picked up from the file size.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.count = 0
+        self.last_period = None
+        self._run_periods = array('q')
+        self._run_rows = array('q')
+        self._lock = threading.Lock()
+        self._map = None
+        self._map_size = 0
+        with self._lock:
+            self._refresh()
+
+    def __len__(self):
+        return self.count
+
+    # --- index ---
+
+    def _index(self, periods, first_row):
+        for offset, period in enumerate(periods):
+            if self.last_period is None or period != self.last_period + 1:
+                self._run_periods.append(period)
+                self._run_rows.append(first_row + offset)
+            self.last_period = period
+
+    def _refresh(self):
+        """Indexes records appended since the last look (by us or another process)."""
+        try:
+            size = os.path.getsize(self.path) // RECORD.size * RECORD.size
+        except OSError:
+            return
+        if size <= self.count * RECORD.size: return
+        with open(self.path, "rb") as f:
+            f.seek(self.count * RECORD.size)
+            data = f.read(size - self.count * RECORD.size)
+        self._index([p for p, _ in RECORD.iter_unpack(data)], self.count)
+        self.count = size // RECORD.size
+
+    def _lower_row(self, period):
+        """First row whose period is >= `period`."""
+        i = bisect_right(self._run_periods, period) - 1
+        if i < 0: return 0
+        run_end = self._run_rows[i + 1] if i + 1 < len(self._run_rows) else self.count
+        return min(self._run_rows[i] + period - self._run_periods[i], run_end)
+
+    # --- writes ---
+
+    def append(self, history):
+        """Appends the draws of `history` newer than the stored tail. Returns how many."""
+        if not isinstance(history, DrawHistory):
+            history = DrawHistory.from_rows(history)
+        with self._lock:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(self.path, "ab") as f:
+                if fcntl: fcntl.flock(f, fcntl.LOCK_EX)
+                try:
+                    self._refresh()
+                    valid = self.count * RECORD.size
+                    if f.seek(0, os.SEEK_END) != valid:
+                        f.truncate(valid)  # drop a torn record from a crashed writer
+                    fresh = [(p, r) for p, r in zip(history.periods, history.results)
+                             if self.last_period is None or p > self.last_period]
+                    if not fresh: return 0
+                    f.write(b"".join(RECORD.pack(p, r) for p, r in fresh))
+                    f.flush()
+                finally:
+                    if fcntl: fcntl.flock(f, fcntl.LOCK_UN)
+            self._index([p for p, _ in fresh], self.count)
+            self.count += len(fresh)
+            return len(fresh)
+
+    # --- reads ---
+
+    def _rows(self, start, stop):
+        if stop <= start: return DrawHistory()
+        if self._map is None or self._map_size < stop * RECORD.size:
+            if self._map is not None: self._map.close()
+            with open(self.path, "rb") as f:
+                self._map = mmap.mmap(f.fileno(), self.count * RECORD.size, access=mmap.ACCESS_READ)
+            self._map_size = self.count * RECORD.size
+        periods = array('q')
+        results = bytearray()
+        for p, r in RECORD.iter_unpack(self._map[start * RECORD.size:stop * RECORD.size]):
+            periods.append(p)
+            results.append(r)
+        return DrawHistory(periods, results)
+
+    def tail(self, n):
+        """The newest `n` draws as a DrawHistory."""
+        with self._lock:
+            self._refresh()
+            return self._rows(max(0, self.count - n), self.count)
+
+    def read_range(self, first_period, last_period):
+        """Stored draws with first_period <= period <= last_period."""
+        with self._lock:
+            self._refresh()
+            return self._rows(self._lower_row(int(first_period)), self._lower_row(int(last_period) + 1))
+
+    def __contains__(self, period):
+        with self._lock:
+            row = self._lower_row(int(period))
+            return row < self.count and self._rows(row, row + 1).periods[0] == int(period)
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+def get_store(source, game_type):
+    """The DrawStore for (source, game_type), opened on first use."""
+    key = (source, game_type)
+    store = _stores.get(key)
+    if store is None:
+        with _stores_lock:
+            store = _stores.get(key)
+            if store is None:
+                store = _stores[key] = DrawStore(os.path.join(DRAW_STORE_DIR, f"{source}_{game_type}.bin"))
+    return store
@@ -0,0 +1,95 @@
+import json
+from array import array
+from typing import List, Optional, Union
+
+from history import DrawHistory
+
+# Optional accelerators, best first: msgspec decodes straight into typed
+# structs, orjson is a fast generic codec, the stdlib is the fallback.
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+BACKEND = "msgspec" if msgspec else "orjson" if orjson else "json"
+
+# --- GENERIC ---
+
+if orjson:
+    dumps = orjson.dumps
+    loads = orjson.loads
+elif msgspec:
+    dumps = msgspec.json.encode
+    loads = msgspec.json.decode
+else:
+    def dumps(obj):
+        return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+    def loads(data):
+        return json.loads(data)
+
+# --- UPSTREAM PAYLOADS ---
+# WinGo (Tiranga/RajaGames) and TrustWin answer with the same envelope:
+#   current: {"data": {"issueNumber": "..."}}  (or a bare {"issueNumber": ...})
+#   history: {"data": {"list": [{"issueNumber": "...", "number": "7", ...}]}}
+# Only these fields are decoded; everything else is skipped.
+
+def _current_from_dict(data):
+    if isinstance(data, dict):
+        if 'data' in data and isinstance(data['data'], dict):
+            return data['data'].get('issueNumber')
+        elif 'issueNumber' in data:
+            return data.get('issueNumber')
+    return None
+
+def _history_from_dict(data):
+    return DrawHistory.from_upstream(data.get('data', {}).get('list', []))
+
+if msgspec:
+    class _Draw(msgspec.Struct):
+        issueNumber: int
+        number: int
+
+    class _DrawList(msgspec.Struct):
+        list: List[_Draw] = []  # "list" shadows the builtin inside this class only
+
+    class _HistoryPayload(msgspec.Struct):
+        data: Optional[_DrawList] = None
+
+    class _Issue(msgspec.Struct):
+        issueNumber: Optional[Union[int, str]] = None
+
+    class _CurrentPayload(msgspec.Struct):
+        data: Optional[_Issue] = None
+        issueNumber: Optional[Union[int, str]] = None
+
+    # strict=False lets the quoted numbers upstream sends decode as ints
+    _history_decoder = msgspec.json.Decoder(_HistoryPayload, strict=False)
+    _current_decoder = msgspec.json.Decoder(_CurrentPayload)
+
+def decode_current(raw):
+    """issueNumber from a current-period response body (bytes), or None."""
+    if msgspec:
+        try:
+            payload = _current_decoder.decode(raw)
+            if payload.data is not None: return payload.data.issueNumber
+            return payload.issueNumber
+        except msgspec.ValidationError:
+            pass  # unexpected shape: take the generic path
+    return _current_from_dict(loads(raw))
+
+def decode_history(raw):
+    """DrawHistory from a history response body (bytes)."""
+    if msgspec:
+        try:
+            payload = _history_decoder.decode(raw)
+            rows = payload.data.list if payload.data is not None else []
+            return DrawHistory(array('q', [d.issueNumber for d in reversed(rows)]),
+                               bytearray(d.number for d in reversed(rows)))
+        except (msgspec.ValidationError, ValueError):
+            pass
+    return _history_from_dict(loads(raw))
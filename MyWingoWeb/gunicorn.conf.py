@@ -0,0 +1,44 @@
+# Production launcher for the web app (replaces `app.run(debug=True)`).
+#
+#   gunicorn -c gunicorn.conf.py asgi:application   # async, uvicorn workers
+#   WEB_MODE=wsgi gunicorn -c gunicorn.conf.py app:app
+import os
+import glob
+import shutil
+import tempfile
+import multiprocessing
+
+bind = os.getenv("WEB_BIND", "0.0.0.0:5000")
+workers = int(os.getenv("WEB_WORKERS", multiprocessing.cpu_count()))
+
+# Each worker keeps its own metrics; they snapshot into METRICS_DIR and
+# /metrics sums the snapshots, so a scrape sees every worker whichever one
+# answers it. Set here, before the workers fork, so they all inherit it.
+_own_metrics_dir = "METRICS_DIR" not in os.environ
+os.environ.setdefault("METRICS_DIR", os.path.join(tempfile.gettempdir(), f"wingo-metrics-{os.getpid()}"))
+
+if os.getenv("WEB_MODE", "asgi") == "asgi":
+    # One event loop per worker; uvloop/httptools are picked up when installed.
+    worker_class = "uvicorn.workers.UvicornWorker"
+else:
+    worker_class = "gthread"
+    threads = int(os.getenv("WEB_THREADS", "32"))
+
+timeout = int(os.getenv("WEB_TIMEOUT", "30"))
+graceful_timeout = 10
+keepalive = 5
+accesslog = os.getenv("WEB_ACCESS_LOG", None)
+
+def on_starting(server):
+    # Drop snapshots left by an earlier run using the same directory.
+    for path in glob.glob(os.path.join(os.environ["METRICS_DIR"], "*.json")):
+        os.remove(path)
+
+def worker_exit(server, worker):
+    # Final snapshot, so counters of a restarted worker are not lost.
+    from metrics import REGISTRY
+    REGISTRY.write_snapshot()
+
+def on_exit(server):
+    if _own_metrics_dir:
+        shutil.rmtree(os.environ["METRICS_DIR"], ignore_errors=True)
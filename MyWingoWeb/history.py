@@ -0,0 +1,73 @@
+from array import array
+
+# Maps each result digit to an ASCII '1' (Big) or '0' (Small).
+_BIG_BITS = bytes(0x31 if v > 4 else 0x30 for v in range(256))
+_OUTCOMES = tuple("Big" if v > 4 else "Small" for v in range(256))
+
+class DrawHistory:
+    """
+    Columnar draw history, oldest first.
+
+    Periods are stored as int64 and result digits as bytes. Big/Small
+    outcomes are derived from the digits: tail_mask() packs the newest
+    rows into a bitmask and outcomes() lists them, which is what the
+    trend helpers in prediction_engine read. Indexing and iteration
+    still yield {'p', 'r', 'o'} rows, so existing `x['o']` call sites
+    keep working; slices return a DrawHistory.
+    """
+
+    __slots__ = ("periods", "results")
+
+    def __init__(self, periods=None, results=None):
+        self.periods = periods if periods is not None else array('q')
+        self.results = results if results is not None else bytearray()
+
+    def tail_mask(self, n):
+        """Outcomes of the newest `n` rows as a bitmask: bit 0 is the newest row, set = Big."""
+        # One '0'/'1' string parsed at once: linear in n
+        bits = self.results[-n:].translate(_BIG_BITS) if n > 0 else b""
+        return int(bits, 2) if bits else 0
+
+    def outcomes(self, n=None):
+        """Big/Small of the newest `n` rows (all rows if None), oldest first."""
+        if n is not None and n <= 0: return []
+        return [_OUTCOMES[r] for r in (self.results if n is None else self.results[-n:])]
+
+    @classmethod
+    def from_upstream(cls, raw_list):
+        """Builds from an upstream `data.list` (newest first)."""
+        periods = array('q', [int(item['issueNumber']) for item in reversed(raw_list)])
+        results = bytearray(int(item['number']) for item in reversed(raw_list))
+        return cls(periods, results)
+
+    @classmethod
+    def from_rows(cls, rows):
+        return cls(array('q', [int(x['p']) for x in rows]), bytearray(int(x['r']) for x in rows))
+
+    def __len__(self):
+        return len(self.results)
+
+    def is_big(self, i):
+        return self.results[i] > 4
+
+    def outcome(self, i):
+        return "Big" if self.is_big(i) else "Small"
+
+    def _row(self, i):
+        r = self.results[i]
+        return {'p': str(self.periods[i]), 'r': r, 'o': "Big" if r > 4 else "Small"}
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return DrawHistory(self.periods[index], self.results[index])
+        return self._row(index)
+
+    def __iter__(self):
+        for i in range(len(self.results)):
+            yield self._row(i)
+
+    def __repr__(self):
+        return f"DrawHistory({len(self)} draws)"
+
+    def to_rows(self):
+        return list(self)
@@ -0,0 +1,204 @@
+"""
+Minimal in-process metrics with Prometheus text exposition.
+
+Counters and histograms keep one small list per label combination behind
+a single lock, so an observation is a dict lookup plus a bisect. Labels
+are passed positionally in the order declared.
+
+Under gunicorn every worker has its own REGISTRY. When METRICS_DIR is set,
+each process writes a snapshot of its series to <METRICS_DIR>/<pid>.json
+every METRICS_SNAPSHOT_INTERVAL seconds (and on exit), and render() sums
+the snapshots of all workers, so any worker answers a scrape with the
+totals. Files of exited workers are kept so counters never go backwards.
+"""
+import os
+import glob
+import json
+import time
+import bisect
+import logging
+import threading
+from functools import wraps
+
+from config import METRICS_DIR, METRICS_SNAPSHOT_INTERVAL
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _label_str(names, values, extra=""):
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra: parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount=1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def value(self, *label_values):
+        return self._values.get(label_values, 0)
+
+    def items(self):
+        with self._lock:
+            return list(self._values.items())
+
+    def render(self, items=None):
+        for values, total in (self.items() if items is None else items):
+            yield f"{self.name}{_label_str(self.labels, values)} {total}"
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(label_values)
+            if series is None:
+                # per-bucket counts (+Inf last), then sum
+                series = self._values[label_values] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[i] += 1
+            series[-1] += value
+
+    def time(self, *label_values):
+        return _Timer(self, label_values)
+
+    def items(self):
+        with self._lock:
+            return [(v, list(s)) for v, s in self._values.items()]
+
+    def render(self, items=None):
+        for values, series in (self.items() if items is None else items):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series):
+                cumulative += count
+                le = 'le="+Inf"' if bound == float("inf") else f'le="{bound!r}"'
+                yield f"{self.name}_bucket{_label_str(self.labels, values, le)} {cumulative}"
+            yield f"{self.name}_sum{_label_str(self.labels, values)} {series[-1]}"
+            yield f"{self.name}_count{_label_str(self.labels, values)} {cumulative}"
+
+class _Timer:
+    __slots__ = ("histogram", "label_values", "start")
+
+    def __init__(self, histogram, label_values):
+        self.histogram = histogram
+        self.label_values = label_values
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start, *self.label_values)
+        return False
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+
+    def counter(self, name, help_text, labels=()):
+        return self._metrics.setdefault(name, Counter(name, help_text, labels))
+
+    def histogram(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+        return self._metrics.setdefault(name, Histogram(name, help_text, labels, buckets))
+
+    def snapshot(self):
+        return {m.name: [[list(values), data] for values, data in m.items()]
+                for m in list(self._metrics.values())}
+
+    def write_snapshot(self):
+        """Writes this process's series to METRICS_DIR (atomically)."""
+        if not METRICS_DIR: return
+        os.makedirs(METRICS_DIR, exist_ok=True)
+        path = os.path.join(METRICS_DIR, f"{os.getpid()}.json")
+        tmp = path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.snapshot(), f)
+        os.replace(tmp, path)
+
+    def _merged(self):
+        """Per-metric items summed over every worker snapshot in METRICS_DIR."""
+        totals = {name: {} for name in self._metrics}
+        for path in glob.glob(os.path.join(METRICS_DIR, "*.json")):
+            try:
+                with open(path) as f:
+                    snapshot = json.load(f)
+            except (OSError, ValueError):
+                continue  # a worker mid-write or a stray file
+            for name, items in snapshot.items():
+                merged = totals.get(name)
+                if merged is None: continue
+                for values, data in items:
+                    key = tuple(values)
+                    if key not in merged:
+                        merged[key] = data
+                    elif isinstance(data, list):
+                        merged[key] = [a + b for a, b in zip(merged[key], data)]
+                    else:
+                        merged[key] += data
+        return totals
+
+    def render(self):
+        totals = None
+        if METRICS_DIR:
+            self.write_snapshot()
+            totals = self._merged()
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render(None if totals is None else list(totals[metric.name].items())))
+        return "\n".join(lines) + "\n"
+
+REGISTRY = Registry()
+
+_snapshot_thread = None
+
+def start_snapshots():
+    """Starts this process's periodic snapshot writer (no-op without METRICS_DIR)."""
+    global _snapshot_thread
+    if not METRICS_DIR or _snapshot_thread is not None: return
+
+    def loop():
+        while True:
+            time.sleep(METRICS_SNAPSHOT_INTERVAL)
+            try:
+                REGISTRY.write_snapshot()
+            except OSError as e:
+                logger.warning(f"Metrics snapshot failed: {e}")
+
+    _snapshot_thread = threading.Thread(target=loop, name="metrics-snapshot", daemon=True)
+    _snapshot_thread.start()
+
+def timed(histogram, *label_values):
+    """Decorator form of histogram.time()."""
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - start, *label_values)
+        return wrapper
+    return decorator
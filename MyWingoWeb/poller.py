@@ -0,0 +1,109 @@
+import time
+import random
+import logging
+import threading
+from api_helper import refresh_game_data, next_draw_at, draw_window
+from draw_clock import DrawClock
+from config import POLLER_DELAY, POLLER_RETRIES, POLLER_RETRY_SPACING, POLLER_MAX_SPACING
+
+logger = logging.getLogger(__name__)
+
+# One entry per upstream source; RajaGames reads Tiranga's data.
+POLL_TARGETS = [
+    ("Tiranga", "30s"),
+    ("Tiranga", "1m"),
+    ("TrustWin", "30s"),
+    ("TrustWin", "1m"),
+]
+
+class DrawPoller:
+    """
+    Background ingestion: fetches every (platform, game_type) just after
+    each draw boundary and stores it via api_helper, so web requests
+    only ever read local state.
+
+    Boundaries come from the learned DrawClock. Each draw is polled from
+    the earliest time it can be out, so sightings of the old period keep
+    tightening the clock's window. If upstream still shows the old
+    period, jittered retries follow, backing off after `retries`, until
+    the new period shows up.
+    """
+
+    def __init__(self, targets=POLL_TARGETS, delay=POLLER_DELAY, retries=POLLER_RETRIES,
+                 retry_spacing=POLLER_RETRY_SPACING, max_spacing=POLLER_MAX_SPACING):
+        self.targets = list(targets)
+        self.delay = delay
+        self.retries = retries
+        self.retry_spacing = retry_spacing
+        self.max_spacing = max_spacing
+        self._stop = threading.Event()
+        self._threads = []
+
+    def start(self):
+        if self.is_running(): return
+        self._stop.clear()
+        self._threads = []
+        for platform, game_type in self.targets:
+            t = threading.Thread(
+                target=self._run, args=(platform, game_type),
+                name=f"poller-{platform}-{game_type}", daemon=True
+            )
+            t.start()
+            self._threads.append(t)
+        logger.info(f"Draw poller started for {len(self.targets)} targets.")
+
+    def stop(self):
+        self._stop.set()
+        for t in self._threads:
+            t.join(timeout=5)
+        self._threads = []
+
+    def is_running(self):
+        return any(t.is_alive() for t in self._threads)
+
+    def _poll(self, platform, game_type, min_period=None):
+        try:
+            period, _ = refresh_game_data(game_type, platform, min_period)
+            if not period:
+                logger.warning(f"Poller got no period ({platform} {game_type})")
+            return period
+        except Exception as e:
+            logger.error(f"Poller error ({platform} {game_type}): {e}")
+            return None
+
+    @staticmethod
+    def _is_new(latest, expected):
+        if not latest: return False
+        if expected is None: return True
+        # A jump back further than DrawClock.MAX_JUMP is a renumbering, not a stale read
+        return int(latest) >= expected or expected - int(latest) > DrawClock.MAX_JUMP
+
+    def _next_poll_at(self, platform, game_type, expected):
+        # From the window's lower bound: polling from the upper bound would
+        # never sample inside the window, so a wide one could not narrow.
+        window = draw_window(game_type, expected, platform=platform) if expected else None
+        if window is None:
+            return next_draw_at(game_type, platform=platform)
+        return window[0]
+
+    def _run(self, platform, game_type):
+        period = self._poll(platform, game_type)
+        while not self._stop.is_set():
+            expected = int(period) + 1 if period else None
+            wait = self._next_poll_at(platform, game_type, expected) + self.delay - time.time()
+            if self._stop.wait(max(0.0, wait)): break
+            latest = self._poll(platform, game_type, expected)
+            attempt = 0
+            while not self._is_new(latest, expected):
+                # Late draw (or upstream down): keep polling, backing off
+                spacing = min(self.max_spacing, self.retry_spacing * 2 ** max(0, attempt - self.retries + 1))
+                if self._stop.wait(spacing * random.uniform(0.5, 1.5)): return
+                latest = self._poll(platform, game_type, expected)
+                attempt += 1
+            period = latest
+
+poller = DrawPoller()
+
+def start_poller():
+    poller.start()
+    return poller
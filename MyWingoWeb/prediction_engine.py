@@ -1,38 +1,84 @@
 import random
 import hashlib
+import threading
+from collections import OrderedDict
 from typing import Optional
-from config import BETTING_SEQUENCE, MAX_LEVEL, ALL_PATTERNS, PATTERN_LENGTH, V5_SALT, TRUSTWIN_SALT
-from database import get_user_data, update_user_field
+from config import (BETTING_SEQUENCE, MAX_LEVEL, ALL_PATTERNS, PATTERN_LENGTH, V5_SALT, TRUSTWIN_SALT,
+                    HASH_PRECOMPUTE_AHEAD, HASH_TABLE_SIZE)
+from trend_state import TrendState
+from history import DrawHistory
+from metrics import REGISTRY, timed
 
-# --- V5+ ENGINE (HASH + TREND CONFLUENCE + PLATFORM SALT) ---
-def get_v5_logic(period_number, game_type="30s", history_data=None, platform="Tiranga"):
-    """
-    V5+ Logic: 
-    1. Selects Salt based on Platform (TrustWin vs Others).
-    2. SHA256(Period + Salt).
-    3. Checks Confluence with History Trend.
-    """
-    # 1. SELECT SALT
-    salt = TRUSTWIN_SALT if platform == "TrustWin" else V5_SALT
-    
-    # 2. Base Hash Prediction
-    data_str = str(period_number) + salt
+ENGINE_LATENCY = REGISTRY.histogram(
+    "wingo_engine_seconds", "Prediction engine call latency.", ("function",),
+    buckets=(0.000001, 0.000005, 0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.1))
+
+# --- V5 HASH TABLE ---
+# The hash digit depends only on (period, salt), so upcoming periods are
+# hashed in one batch and kept in a bounded LRU table.
+
+_hash_table = OrderedDict()
+_hash_lock = threading.Lock()
+
+def get_salt(platform="Tiranga"):
+    return TRUSTWIN_SALT if platform == "TrustWin" else V5_SALT
+
+def _compute_hash_digit(period_str, salt):
+    data_str = period_str + salt
     try:
         hash_obj = hashlib.sha256(data_str.encode('utf-8'))
         hash_hex = hash_obj.hexdigest()
     except:
         hash_hex = "0000"
 
-    digit = None
     for char in reversed(hash_hex):
         if char.isdigit():
-            digit = int(char)
-            break
-    if digit is None: digit = 0
-    
+            return int(char)
+    return 0
+
+def _upcoming_periods(period_str, count):
+    # Only canonical integers can be stepped forward without changing
+    # their string form (e.g. "000" must hash as "000").
+    if count > 1 and period_str.isdigit() and str(int(period_str)) == period_str:
+        start = int(period_str)
+        return [str(start + i) for i in range(count)]
+    return [period_str]
+
+def precompute_hash_digits(period_number, platform="Tiranga", count=HASH_PRECOMPUTE_AHEAD):
+    """Hashes `period_number` and the next `count - 1` periods into the table."""
+    salt = get_salt(platform)
+    with _hash_lock:
+        missing = [p for p in _upcoming_periods(str(period_number), count) if (p, salt) not in _hash_table]
+    computed = [((p, salt), _compute_hash_digit(p, salt)) for p in missing]
+    with _hash_lock:
+        _hash_table.update(computed)
+        while len(_hash_table) > HASH_TABLE_SIZE:
+            _hash_table.popitem(last=False)
+
+def get_hash_digit(period_number, platform="Tiranga"):
+    key = (str(period_number), get_salt(platform))
+    with _hash_lock:
+        digit = _hash_table.get(key)
+        if digit is not None:
+            _hash_table.move_to_end(key)
+            return digit
+    precompute_hash_digits(key[0], platform)
+    with _hash_lock:
+        digit = _hash_table.get(key)
+    return digit if digit is not None else _compute_hash_digit(*key)
+
+def get_hash_digits(periods, platform="Tiranga"):
+    """Batch lookup for back-testing; misses are computed but not cached."""
+    salt = get_salt(platform)
+    with _hash_lock:
+        cached = [_hash_table.get((str(p), salt)) for p in periods]
+    return [d if d is not None else _compute_hash_digit(str(p), salt) for p, d in zip(periods, cached)]
+
+# --- V5+ ENGINE (HASH + TREND CONFLUENCE + PLATFORM SALT) ---
+def _apply_confluence(digit, history_data, platform):
     hash_pred = "Big" if digit > 4 else "Small"
     
-    # 3. Confluence Check (Refining the prediction)
+    # Confluence Check (Refining the prediction)
     confluence_txt = ""
     final_pred = hash_pred
     
@@ -50,16 +96,49 @@ def get_v5_logic(period_number, game_type="30s", history_data=None, platform="Ti
     pattern_name = f"V5+ {platform} {confluence_txt}"
     return final_pred, pattern_name, digit
 
+@timed(ENGINE_LATENCY, "get_v5_logic")
+def get_v5_logic(period_number, game_type="30s", history_data=None, platform="Tiranga"):
+    """
+    V5+ Logic: 
+    1. Selects Salt based on Platform (TrustWin vs Others).
+    2. SHA256(Period + Salt), served from the precomputed table.
+    3. Checks Confluence with History Trend.
+    """
+    return _apply_confluence(get_hash_digit(period_number, platform), history_data, platform)
+
+def get_v5_batch(periods, game_type="30s", history_data=None, platform="Tiranga"):
+    """get_v5_logic for many periods at once (same history for each)."""
+    return [_apply_confluence(d, history_data, platform) for d in get_hash_digits(periods, platform)]
+
 # --- SURESHOT / TREND HELPERS ---
 
+# Each helper also accepts a TrendState, answered in O(1) without slicing,
+# and reads a DrawHistory's digit column instead of building row dicts.
+
+def _outcomes(history, n=None):
+    """Outcomes of the newest `n` rows (all if None) of a row list or DrawHistory."""
+    if isinstance(history, DrawHistory): return history.outcomes(n)
+    return [x['o'] for x in (history if n is None else history[-n:])]
+
 def is_super_trend(history):
+    if isinstance(history, TrendState): return history.is_super_trend()
     if not history: return False
+    if isinstance(history, DrawHistory):
+        n = min(5, len(history))
+        return history.tail_mask(n) in (0, (1 << n) - 1)
     recent = [x['o'] for x in history[-5:]]
     if len(set(recent)) == 1: return True
     return False
 
 def get_high_confidence_prediction(history):
+    if isinstance(history, TrendState): return history.high_confidence_prediction()
     if not history or len(history) < 10: return None
+    if isinstance(history, DrawHistory):
+        last4 = history.tail_mask(4)
+        newest = "Big" if last4 & 1 else "Small"
+        if last4 in (0b0000, 0b1111): return newest  # streak
+        if last4 in (0b0101, 0b1010): return "Small" if newest == "Big" else "Big"  # zigzag
+        return None
     recent = [x['o'] for x in history[-10:]]
     
     # Streak Logic (4 in a row)
@@ -96,9 +175,9 @@ def get_number_for_outcome(outcome: str) -> int:
 # --- V1 to V4 ENGINES (RESTORED) ---
 
 def get_next_pattern_prediction(history_objs: list) -> tuple[Optional[str], str]:
+    if isinstance(history_objs, TrendState): return history_objs.next_pattern_prediction()
     if not history_objs: return None, "Random"
-    history_outcomes = [x['o'] for x in history_objs]
-    recent_history = history_outcomes[-PATTERN_LENGTH:] 
+    recent_history = _outcomes(history_objs, PATTERN_LENGTH)
     recent_len = len(recent_history)
     
     for pattern_list, pattern_name in ALL_PATTERNS:
@@ -115,7 +194,9 @@ def generate_v1_prediction(api_history, current_prediction, outcome):
     # Pattern Matcher
     pattern_prediction, pattern_name = get_next_pattern_prediction(api_history)
     if pattern_prediction: return pattern_prediction, pattern_name
-    if api_history: return api_history[-1]['o'], "V1 Streak"
+    if isinstance(api_history, TrendState):
+        if api_history.last: return api_history.last, "V1 Streak"
+    elif api_history: return _outcomes(api_history, 1)[0], "V1 Streak"
     return random.choice(['Small', 'Big']), "V1 Random"
 
 def generate_v2_prediction(history, current_prediction, outcome, current_level):
@@ -131,18 +212,25 @@ def generate_v3_prediction():
 def generate_v4_prediction(history_outcomes, current_prediction, outcome, current_level):
     # Trend Follower
     if current_level == 4: return ('Small' if current_prediction == 'Big' else 'Big'), "V4 Safety Switch"
-    if len(history_outcomes) >= 3:
+    if isinstance(history_outcomes, TrendState):
+        if history_outcomes.streak >= 3:
+            return history_outcomes.last, "V4 Strong Trend"
+    elif len(history_outcomes) >= 3:
         if history_outcomes[-1] == history_outcomes[-2] == history_outcomes[-3]:
             return history_outcomes[-1], "V4 Strong Trend"
     return ('Small' if current_prediction == 'Big' else 'Big'), "V4 Smart Switch"
 
 # --- MAIN CONTROLLER (ROUTER) ---
 
+@timed(ENGINE_LATENCY, "process_prediction_request")
 def process_prediction_request(user_id, outcome, api_history=[]):
     """
     Decides which engine to use based on user settings.
     Legacy V1-V4 logic is preserved here.
     """
+    # Imported here so the hash engine can be used without the database.
+    from database import get_user_data, update_user_fields
+
     state = get_user_data(user_id)
     mode = state.get("prediction_mode", "V5")
     current_prediction = state.get('current_prediction', "Small")
@@ -155,12 +243,12 @@ def process_prediction_request(user_id, outcome, api_history=[]):
     elif mode == "V3":
         new_pred, p_name = generate_v3_prediction()
     elif mode == "V4":
-        hist_strings = [x['o'] for x in api_history] if api_history else []
+        if isinstance(api_history, TrendState): hist_strings = api_history
+        else: hist_strings = _outcomes(api_history) if api_history else []
         new_pred, p_name = generate_v4_prediction(hist_strings, current_prediction, outcome, current_level)
     else: 
         # Default to V5 logic (Standard Tiranga salt if called this way)
         new_pred, p_name, _ = get_v5_logic("000", "30s", api_history, platform="Tiranga")
 
-    update_user_field(user_id, "current_prediction", new_pred)
-    update_user_field(user_id, "current_pattern_name", p_name)
+    update_user_fields(user_id, {"current_prediction": new_pred, "current_pattern_name": p_name})
     return new_pred, p_name
@@ -0,0 +1,110 @@
+import time
+import uuid
+import threading
+from config import STATE_BACKEND
+
+class LocalBackend:
+    """
+    In-process default: a TTL dict. Locks always succeed across threads
+    once. Holds at most `max_entries` keys; past that, expired keys go
+    first, then the oldest writes.
+    """
+
+    is_shared = False
+
+    def __init__(self, max_entries=4096):
+        self.max_entries = max_entries
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def _insert(self, key, entry, now):
+        # caller holds _lock; re-inserting keeps dict order = write order
+        self._data.pop(key, None)
+        self._data[key] = entry
+        if len(self._data) > self.max_entries:
+            for k in [k for k, (exp, _) in self._data.items() if exp < now]:
+                del self._data[k]
+            # Evict down to 90% so a full cache doesn't rescan on every write
+            while len(self._data) > self.max_entries * 0.9:
+                del self._data[next(iter(self._data))]
+
+    def _live(self, key, now):
+        entry = self._data.get(key)
+        if entry is None: return None
+        if entry[0] < now:
+            del self._data[key]
+            return None
+        return entry[1]
+
+    def get(self, key):
+        with self._lock:
+            return self._live(key, time.time())
+
+    def set(self, key, value, ttl):
+        now = time.time()
+        with self._lock:
+            self._insert(key, (now + ttl, value), now)
+
+    def acquire(self, key, ttl):
+        """Returns a token if this caller now holds `key`, else None."""
+        token = uuid.uuid4().hex
+        now = time.time()
+        with self._lock:
+            if self._live(key, now) is not None: return None
+            self._insert(key, (now + ttl, token), now)
+        return token
+
+    def release(self, key, token):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry and entry[1] == token:
+                del self._data[key]
+
+class RedisBackend:
+    """
+    Shared tier for several workers or nodes. Works with any
+    Redis-protocol server (redis, valkey, a local stand-in).
+    """
+
+    is_shared = True
+
+    _RELEASE = "if redis.call('get', KEYS[1]) == ARGV[1] then return redis.call('del', KEYS[1]) end return 0"
+
+    def __init__(self, url, prefix="wingo:"):
+        import redis
+        self.client = redis.Redis.from_url(url, socket_timeout=1, socket_connect_timeout=1)
+        self.prefix = prefix
+
+    def get(self, key):
+        return self.client.get(self.prefix + key)
+
+    def set(self, key, value, ttl):
+        self.client.set(self.prefix + key, value, px=int(ttl * 1000))
+
+    def acquire(self, key, ttl):
+        token = uuid.uuid4().hex
+        if self.client.set(self.prefix + key, token, nx=True, px=int(ttl * 1000)):
+            return token
+        return None
+
+    def release(self, key, token):
+        self.client.eval(self._RELEASE, 1, self.prefix + key, token)
+
+_backend = None
+_backend_lock = threading.Lock()
+
+def get_backend():
+    """Backend selected by STATE_BACKEND: "local" or a redis:// URL."""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                if STATE_BACKEND.startswith(("redis://", "rediss://", "unix://")):
+                    _backend = RedisBackend(STATE_BACKEND)
+                else:
+                    _backend = LocalBackend()
+    return _backend
+
+def set_backend(backend):
+    global _backend
+    _backend = backend
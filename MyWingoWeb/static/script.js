@@ -1,5 +1,65 @@
 document.addEventListener('DOMContentLoaded', () => {
     let selectedTime = "30s";
+    let liveSource = null;
+
+    const resultCircle = document.getElementById('result-circle');
+    const periodDisplay = document.getElementById('period-display');
+    const predText = document.getElementById('prediction-text');
+    const trendStrip = document.getElementById('trend-strip');
+    const statusMsg = document.getElementById('status-msg');
+    const liveBtn = document.getElementById('live-btn');
+
+    function renderPrediction(data) {
+        if (data.status === "success") {
+            // Update UI with Result
+            periodDisplay.innerText = data.period;
+            predText.innerText = data.prediction;
+            
+            // Set Color
+            resultCircle.className = "result-circle";
+            if (data.prediction === "Big") {
+                resultCircle.classList.add('big');
+            } else {
+                resultCircle.classList.add('small');
+            }
+
+            document.getElementById('pattern-name').innerText = data.pattern;
+            
+            // Update Trend Strip
+            trendStrip.innerHTML = data.trend.join(" ");
+        } else {
+            predText.innerText = "ERR";
+        }
+    }
+
+    // Live Mode: subscribe to one push per draw instead of polling
+    function stopLive() {
+        if (liveSource) {
+            liveSource.close();
+            liveSource = null;
+        }
+        liveBtn.classList.remove('active');
+        statusMsg.innerText = "v5.0.1 Connected";
+    }
+
+    function startLive() {
+        stopLive();
+        const platform = document.getElementById('platform').value;
+        const params = new URLSearchParams({ platform: platform, time: selectedTime });
+        liveSource = new EventSource('/api/stream?' + params.toString());
+        liveSource.onmessage = (event) => renderPrediction(JSON.parse(event.data));
+        liveSource.onerror = () => { statusMsg.innerText = "LIVE reconnecting..."; };
+        liveSource.onopen = () => { statusMsg.innerText = "LIVE " + platform + " " + selectedTime; };
+        liveBtn.classList.add('active');
+    }
+
+    liveBtn.addEventListener('click', () => {
+        if (liveSource) stopLive(); else startLive();
+    });
+
+    document.getElementById('platform').addEventListener('change', () => {
+        if (liveSource) startLive();
+    });
 
     // Time Selection Logic
     document.querySelectorAll('.time-btn').forEach(btn => {
@@ -7,6 +67,7 @@ document.addEventListener('DOMContentLoaded', () => {
             document.querySelectorAll('.time-btn').forEach(b => b.classList.remove('active'));
             btn.classList.add('active');
             selectedTime = btn.dataset.time;
+            if (liveSource) startLive();
         });
     });
 
@@ -14,10 +75,6 @@ document.addEventListener('DOMContentLoaded', () => {
     document.getElementById('predict-btn').addEventListener('click', async () => {
         const platform = document.getElementById('platform').value;
         const btn = document.getElementById('predict-btn');
-        const resultCircle = document.getElementById('result-circle');
-        const periodDisplay = document.getElementById('period-display');
-        const predText = document.getElementById('prediction-text');
-        const trendStrip = document.getElementById('trend-strip');
 
         // UI Loading State
         btn.innerText = "ANALYZING...";
@@ -27,33 +84,12 @@ document.addEventListener('DOMContentLoaded', () => {
 
         try {
             // Call Python Backend
-            const response = await fetch('/api/predict', {
-                method: 'POST',
-                headers: { 'Content-Type': 'application/json' },
-                body: JSON.stringify({ platform: platform, time: selectedTime })
-            });
+            // GET + no-cache: the browser revalidates with If-None-Match and
+            // reuses its copy on a 304 until the period changes.
+            const query = new URLSearchParams({ platform: platform, time: selectedTime });
+            const response = await fetch('/api/predict?' + query, { cache: 'no-cache' });
 
-            const data = await response.json();
-
-            if (data.status === "success") {
-                // Update UI with Result
-                periodDisplay.innerText = data.period;
-                predText.innerText = data.prediction;
-                
-                // Set Color
-                if (data.prediction === "Big") {
-                    resultCircle.classList.add('big');
-                } else {
-                    resultCircle.classList.add('small');
-                }
-
-                document.getElementById('pattern-name').innerText = data.pattern;
-                
-                // Update Trend Strip
-                trendStrip.innerHTML = data.trend.join(" ");
-            } else {
-                predText.innerText = "ERR";
-            }
+            renderPrediction(await response.json());
         } catch (error) {
             console.error(error);
             predText.innerText = "ERR";
@@ -63,4 +99,4 @@ document.addEventListener('DOMContentLoaded', () => {
         btn.innerText = "GET PREDICTION";
         btn.disabled = false;
     });
-});
\ No newline at end of file
+});
@@ -0,0 +1,125 @@
+import json
+import queue
+import asyncio
+import logging
+import threading
+from api_helper import add_listener, cache_key, get_latest_game_data
+
+logger = logging.getLogger(__name__)
+
+SUBSCRIBER_QUEUE_SIZE = 8
+KEEPALIVE_SECONDS = 15
+
+class _LoopSubscriber:
+    """Subscriber queue for an asyncio client: puts hop onto its event loop."""
+
+    def __init__(self, loop):
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+
+    def _put(self, message):
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            pass
+
+    def put_nowait(self, message):
+        self.loop.call_soon_threadsafe(self._put, message)
+
+class PredictionHub:
+    """
+    Fans out one computed prediction per draw to every subscriber of a
+    (platform, time) channel. `builder(platform, time, period, history)`
+    returns the same payload as /api/predict.
+    """
+
+    def __init__(self, builder):
+        self.builder = builder
+        self._subs = {}
+        self._last = {}
+        self._lock = threading.Lock()
+        add_listener(self.on_draw)
+
+    def subscribe(self, platform, game_time, q=None):
+        channel = (platform, game_time)
+        if q is None: q = queue.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        with self._lock:
+            last = self._last.get(channel)
+        if last is None:
+            # First subscriber: seed the channel from the latest stored draw.
+            period, history = get_latest_game_data(game_time, platform=platform)
+            if period:
+                last = self._publish_one(channel, period, history)
+        if last is not None:
+            q.put_nowait(last)
+        with self._lock:
+            self._subs.setdefault(channel, set()).add(q)
+        return q
+
+    def unsubscribe(self, platform, game_time, q):
+        channel = (platform, game_time)
+        with self._lock:
+            subs = self._subs.get(channel)
+            if subs:
+                subs.discard(q)
+                if not subs:
+                    del self._subs[channel]
+                    self._last.pop(channel, None)
+
+    def _publish_one(self, channel, period, history):
+        payload = self.builder(channel[0], channel[1], period, history)
+        message = json.dumps(payload)
+        with self._lock:
+            self._last[channel] = message
+            subs = list(self._subs.get(channel, ()))
+        for q in subs:
+            try:
+                q.put_nowait(message)
+            except queue.Full:
+                # Slow client: it will catch up on the next draw.
+                pass
+        return message
+
+    def on_draw(self, game_type, platform, period, history):
+        key = cache_key(game_type, platform)
+        with self._lock:
+            channels = [c for c in self._subs if cache_key(c[1], c[0]) == key]
+        for channel in channels:
+            try:
+                self._publish_one(channel, period, history)
+            except Exception as e:
+                logger.error(f"Stream publish error {channel}: {e}")
+
+    def events(self, platform, game_time):
+        """
+        SSE generator for one client (WSGI mode); unsubscribes when the
+        client leaves. It blocks a server thread for the connection.
+        """
+        q = self.subscribe(platform, game_time)
+        try:
+            yield "retry: 3000\n\n"
+            while True:
+                try:
+                    message = q.get(timeout=KEEPALIVE_SECONDS)
+                except queue.Empty:
+                    yield ": ping\n\n"
+                    continue
+                yield f"data: {message}\n\n"
+        finally:
+            self.unsubscribe(platform, game_time, q)
+
+    async def async_events(self, platform, game_time):
+        """events() for ASGI mode: waits on the event loop, not a thread."""
+        sub = _LoopSubscriber(asyncio.get_running_loop())
+        await asyncio.to_thread(self.subscribe, platform, game_time, sub)
+        try:
+            yield "retry: 3000\n\n"
+            while True:
+                try:
+                    message = await asyncio.wait_for(sub.queue.get(), KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": ping\n\n"
+                    continue
+                yield f"data: {message}\n\n"
+        finally:
+            self.unsubscribe(platform, game_time, sub)
@@ -0,0 +1,134 @@
+from config import ALL_PATTERNS, PATTERN_LENGTH
+
+BIG, SMALL = "Big", "Small"
+
+def _pack(outcomes):
+    """Oldest first -> int with the newest outcome in bit 0 (1 = Big)."""
+    code = 0
+    for o in outcomes:
+        code = (code << 1) | (o == BIG)
+    return code
+
+def _build_pattern_table():
+    """
+    Answers get_next_pattern_prediction for every possible window of the
+    last 1..PATTERN_LENGTH outcomes, indexed by (1 << n) | window_bits.
+    """
+    table = [(None, None)] * (1 << (PATTERN_LENGTH + 1))
+    for n in range(1, PATTERN_LENGTH + 1):
+        for code in range(1 << n):
+            recent = [BIG if (code >> (n - 1 - i)) & 1 else SMALL for i in range(n)]
+            for pattern_list, pattern_name in ALL_PATTERNS:
+                pattern_len = len(pattern_list)
+                if n < pattern_len and recent == pattern_list[:n]:
+                    table[(1 << n) | code] = (pattern_list[n], pattern_name)
+                    break
+                if n == pattern_len and recent == pattern_list:
+                    table[(1 << n) | code] = (pattern_list[0], pattern_name)
+                    break
+    return table
+
+_PATTERN_TABLE = _build_pattern_table()
+
+class TrendState:
+    """
+    Incremental outcome tracker for one (platform, game_type).
+
+    Outcomes live in a bit-packed ring (`bits`, newest in bit 0) next to
+    the running streak and alternation lengths, so each new draw is O(1)
+    and the trend helpers in prediction_engine answer without building
+    lists.
+    """
+
+    __slots__ = ("capacity", "_mask", "bits", "count", "streak", "alternation", "last_period")
+
+    def __init__(self, capacity=64):
+        self.capacity = capacity
+        self._mask = (1 << capacity) - 1
+        self.reset()
+
+    def reset(self):
+        self.bits = 0
+        self.count = 0
+        self.streak = 0
+        self.alternation = 0
+        self.last_period = None
+
+    @classmethod
+    def from_history(cls, history, capacity=64):
+        state = cls(capacity)
+        state.sync(history)
+        return state
+
+    def __len__(self):
+        return self.count
+
+    def push(self, outcome, period=None):
+        b = 1 if outcome == BIG else 0
+        if self.count:
+            if b == (self.bits & 1):
+                self.streak += 1
+                self.alternation = 1
+            else:
+                self.streak = 1
+                self.alternation += 1
+        else:
+            self.streak = self.alternation = 1
+        self.bits = ((self.bits << 1) | b) & self._mask
+        if self.count < self.capacity:
+            self.count += 1
+        if period is not None:
+            self.last_period = period
+
+    def sync(self, history):
+        """
+        Appends the rows of `history` (oldest first) newer than the last
+        seen period. A gap in periods rebuilds the state from `history`.
+        Returns the number of outcomes appended.
+        """
+        if not history: return 0
+        if hasattr(history, "results"):
+            # DrawHistory: read the columns directly
+            periods = history.periods
+            outcomes = [BIG if history.is_big(i) else SMALL for i in range(len(history))]
+        else:
+            periods = [int(x['p']) for x in history]
+            outcomes = [x['o'] for x in history]
+
+        start = 0
+        if self.last_period is not None:
+            while start < len(periods) and periods[start] <= self.last_period:
+                start += 1
+            if start == len(periods): return 0
+            if periods[start] != self.last_period + 1:
+                self.reset()
+                start = 0
+        for i in range(start, len(periods)):
+            self.push(outcomes[i], periods[i])
+        return len(periods) - start
+
+    # --- Queries (no allocation) ---
+
+    @property
+    def last(self):
+        if not self.count: return None
+        return BIG if self.bits & 1 else SMALL
+
+    def is_super_trend(self):
+        if not self.count: return False
+        return self.streak >= min(5, self.count)
+
+    def high_confidence_prediction(self):
+        if self.count < 10: return None
+        # Streak Logic (4 in a row)
+        if self.streak >= 4:
+            return self.last
+        # ZigZag (ABAB)
+        if self.alternation >= 4:
+            return SMALL if self.bits & 1 else BIG
+        return None
+
+    def next_pattern_prediction(self):
+        if not self.count: return None, "Random"
+        n = min(self.count, PATTERN_LENGTH)
+        return _PATTERN_TABLE[(1 << n) | (self.bits & ((1 << n) - 1))]